@@ -1,10 +1,25 @@
 import boto3
+import botocore.session
 import json
 import os
-import sys
-from botocore.exceptions import ClientError, NoCredentialsError
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from botocore.config import Config
+from botocore.credentials import RefreshableCredentials
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+from aws_scanner.metrics import instrument_session
+from aws_scanner.ratelimit import install_rate_limiter
 
 AUDIT_ROLE_NAME = "CloudcastleCrossAccountRole"
+ROLE_SESSION_NAME = "CloudCastleSession"
+ASSUME_ROLE_WORKERS = 16  # accounts whose role is assumed at the same time
+AUTH_PROBE_TIMEOUT = 3  # seconds for the STS call of the startup status check
+MAX_POOL_CONNECTIONS = 16  # HTTP connections per client by default: the most scanner threads sharing one client (S3 bucket workers)
+
+# Assumed-role credentials are cached here (per account and role) until they are about to expire
+CREDENTIAL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cloudcastle", "sts_cache")
+CREDENTIAL_EXPIRY_MARGIN = timedelta(minutes=15)
 
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "utils", "cloudcastle_config.json")
 
@@ -17,55 +32,155 @@ def load_aws_config():
 
 
 
-def show_aws_auth_status():
+class SharedSession:
+    """Wrap a boto3 session so several scanner threads can share it, and pool its clients.
+
+    boto3 sessions are not thread-safe, but the clients they create are: client creation
+    is serialized and every client is created once per service, region and cache key, then
+    handed out again. Clients get max_pool_connections HTTP connections so the threads
+    sharing them do not wait on (or discard) connections.
+    """
+
+    def __init__(self, session, max_pool_connections=MAX_POOL_CONNECTIONS):
+        self._session = session
+        self._lock = threading.Lock()
+        self._clients = {}
+        self.max_pool_connections = max_pool_connections
+        self._pool_config = Config(max_pool_connections=max_pool_connections)
+
+    def client(self, service_name, region_name=None, config=None, cache_key=None, **kwargs):
+        """A pooled client. Clients with a config are only reused when the caller names it with cache_key."""
+        region_name = region_name or self._session.region_name
+        config = self._pool_config.merge(config) if config else self._pool_config
+        if config is not self._pool_config and cache_key is None:
+            with self._lock:
+                return self._session.client(service_name, region_name=region_name, config=config, **kwargs)
+
+        key = (service_name, region_name, cache_key, repr(sorted(kwargs.items())))
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._session.client(service_name, region_name=region_name, config=config, **kwargs)
+            return self._clients[key]
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def get_aws_auth_status(timeout=AUTH_PROBE_TIMEOUT):
+    """Check the default AWS credentials with one STS call. Returns (ok, problem or None)."""
     try:
         session = boto3.Session()
-        sts = session.client("sts")
-        status = "✅" if sts.get_caller_identity() else "❌"
-        print(f"[{status}] AWS")
+        sts = session.client("sts", config=Config(
+            connect_timeout=timeout, read_timeout=timeout, retries={"total_max_attempts": 1}
+        ))
+        return bool(sts.get_caller_identity()), None
     except NoCredentialsError:
-        print(" ❌ AWS credentials not configured or default profile is empty.")
-        print("    Check the default profile on .aws/credentials or")
-        print("    Run `aws configure` and setup the access key and secret key as default:")
-        sys.exit(1) 
-    except ClientError as e:
-       print(f"❌ AWS error: {e}")
-       sys.exit(1) 
+        return False, (
+            "AWS credentials not configured or default profile is empty.\n"
+            "    Check the default profile on .aws/credentials or\n"
+            "    Run `aws configure` and setup the access key and secret key as default:"
+        )
+    except (ClientError, BotoCoreError) as e:
+        return False, f"AWS error: {e}"
+
 
+def _credential_cache_path(account_id, role_name):
+    return os.path.join(CREDENTIAL_CACHE_DIR, f"{account_id}_{role_name}.json")
 
-def assume_role(account_id):
-    role_arn = f"arn:aws:iam::{account_id}:role/{AUDIT_ROLE_NAME}"
-    sts_client = boto3.client("sts")
+def load_cached_credentials(account_id, role_name=AUDIT_ROLE_NAME):
+    """Return cached credential metadata for the account/role, or None if missing or close to expiry."""
+    cache_path = _credential_cache_path(account_id, role_name)
+    if not os.path.exists(cache_path):
+        return None
     try:
-        response = sts_client.assume_role(
-            RoleArn=role_arn,
-            RoleSessionName="CloudCastleSession"
-        )
-        creds = response["Credentials"]
-        session = boto3.Session(
-            aws_access_key_id=creds["AccessKeyId"],
-            aws_secret_access_key=creds["SecretAccessKey"],
-            aws_session_token=creds["SessionToken"]
-        )
-        return session
+        with open(cache_path, "r") as f:
+            metadata = json.load(f)
+        expiry = datetime.fromisoformat(metadata["expiry_time"])
+    except (OSError, ValueError, KeyError):
+        return None
+    if expiry - datetime.now(timezone.utc) < CREDENTIAL_EXPIRY_MARGIN:
+        return None
+    return metadata
+
+def save_cached_credentials(account_id, role_name, metadata):
+    """Write credential metadata to the cache, readable by the current user only."""
+    os.makedirs(CREDENTIAL_CACHE_DIR, mode=0o700, exist_ok=True)
+    cache_path = _credential_cache_path(account_id, role_name)
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(metadata, f)
+    os.replace(tmp_path, cache_path)
+
+def fetch_role_credentials(sts_client, account_id, role_name=AUDIT_ROLE_NAME):
+    """Assume the audit role and return (and cache) its credentials in botocore metadata format."""
+    response = sts_client.assume_role(
+        RoleArn=f"arn:aws:iam::{account_id}:role/{role_name}",
+        RoleSessionName=ROLE_SESSION_NAME
+    )
+    creds = response["Credentials"]
+    metadata = {
+        "access_key": creds["AccessKeyId"],
+        "secret_key": creds["SecretAccessKey"],
+        "token": creds["SessionToken"],
+        "expiry_time": creds["Expiration"].isoformat(),
+    }
+    try:
+        save_cached_credentials(account_id, role_name, metadata)
+    except OSError as e:
+        print(f"⚠️ Could not cache credentials for account {account_id}: {e}")
+    return metadata
+
+def assume_role(account_id, sts_client=None, role_name=AUDIT_ROLE_NAME):
+    """Return a session for the account's audit role whose credentials refresh themselves before expiry.
+
+    Every API call made through the session is recorded in the account's ApiMetrics and
+    goes through the account's shared rate limiter; throttled calls are retried. The
+    session is a SharedSession, so its clients are pooled for all the account's scans.
+    """
+    sts_client = sts_client or boto3.client("sts")
+
+    def refresh():
+        return fetch_role_credentials(sts_client, account_id, role_name)
+
+    try:
+        metadata = load_cached_credentials(account_id, role_name) or refresh()
     except ClientError as e:
         # print(f"❌ Could not assume role in account {account_id}: {e}")
         return None
 
-def list_aws_accounts():
+    credentials = RefreshableCredentials.create_from_metadata(
+        metadata=metadata,
+        refresh_using=refresh,
+        method="sts-assume-role"
+    )
+    botocore_session = botocore.session.get_session()
+    botocore_session._credentials = credentials
+    session = boto3.Session(botocore_session=botocore_session)
+    return SharedSession(install_rate_limiter(instrument_session(session, account_id), account_id))
 
+def list_aws_accounts(account_ids=None):
+    """Configured accounts with a session for each (None when the role could not be assumed).
+
+    When account_ids is given, only those accounts are listed (and have their role assumed).
+    """
     try:
         config = load_aws_config()
         if not config:
             print("⚠️ No AWS account config found.")
             return []  # ✅ ensure fallback
+        if account_ids is not None:
+            config = [acct for acct in config if acct["id"] in account_ids]
+
+        # One STS client is shared by all workers: clients are thread-safe, sessions are not
+        sts_client = boto3.client("sts")
+        with ThreadPoolExecutor(max_workers=ASSUME_ROLE_WORKERS) as executor:
+            sessions = list(executor.map(lambda acct: assume_role(acct["id"], sts_client), config))
 
         accounts = []
-        for acct in config:
+        for acct, session in zip(config, sessions):
             account_id = acct["id"]
             account_name = acct.get("name", account_id)
-
-            session = assume_role(account_id)
             status = "✅" if session else "❌"
 
             accounts.append({
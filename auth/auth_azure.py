@@ -1,2 +1,2 @@
-def show_azure_auth_status():
-    print(f"[❌] Azure")
\ No newline at end of file
+def get_azure_auth_status():
+    return False, None
\ No newline at end of file
@@ -1,2 +1,2 @@
-def show_gcp_auth_status():
-    print(f"[❌] GCP")
\ No newline at end of file
+def get_gcp_auth_status():
+    return False, None
\ No newline at end of file
@@ -1,12 +1,47 @@
-import boto3
-from botocore.exceptions import ClientError
-from auth.auth_aws import show_aws_auth_status
-from auth.auth_azure import show_azure_auth_status
-from auth.auth_gcp import show_gcp_auth_status
-
-def get_auth_status():
-    return {
-        "AWS": show_aws_auth_status(),
-        "Azure": show_azure_auth_status(),
-        "GCP": show_gcp_auth_status()
-    }
\ No newline at end of file
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+AUTH_STATUS_TIMEOUT = 5  # seconds to wait for all provider probes together
+
+def probe_aws():
+    from auth.auth_aws import get_aws_auth_status  # imports boto3, so it happens on the probe thread
+    return get_aws_auth_status()
+
+def probe_azure():
+    from auth.auth_azure import get_azure_auth_status
+    return get_azure_auth_status()
+
+def probe_gcp():
+    from auth.auth_gcp import get_gcp_auth_status
+    return get_gcp_auth_status()
+
+AUTH_PROBES = {"AWS": probe_aws, "Azure": probe_azure, "GCP": probe_gcp}
+
+def start_auth_status_probes():
+    """Start every provider's auth probe in the background; returns {provider: future}."""
+    executor = ThreadPoolExecutor(max_workers=len(AUTH_PROBES))
+    futures = {provider: executor.submit(probe) for provider, probe in AUTH_PROBES.items()}
+    executor.shutdown(wait=False)
+    return futures
+
+def get_auth_status(probes=None, timeout=AUTH_STATUS_TIMEOUT):
+    """Print the auth status of each cloud provider and return {provider: True, False or None (no answer)}.
+
+    The probes run concurrently; whatever has not answered within timeout is reported as unknown.
+    """
+    probes = probes or start_auth_status_probes()
+    deadline = time.monotonic() + timeout
+    statuses = {}
+    for provider, future in probes.items():
+        try:
+            ok, problem = future.result(timeout=max(0, deadline - time.monotonic()))
+        except TimeoutError:
+            ok, problem = None, f"{provider} did not answer within {timeout}s, status unknown."
+        except Exception as e:
+            ok, problem = False, f"{provider} error: {e}"
+        statuses[provider] = ok
+
+        print(f"[{'✅' if ok else '⏳' if ok is None else '❌'}] {provider}")
+        if problem:
+            print(f" {'⚠️' if ok is None else '❌'} {problem}")
+    return statuses
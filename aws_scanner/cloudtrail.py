@@ -1,20 +1,21 @@
 import boto3
 import typer
+from aws_scanner.utils import iter_resources
+from logger import record_scan_failure
 from threatintel.mitre import match_findings_to_tactics
 
+CLOUDTRAIL_TRAIL_FIELDS = [
+    "Name", "IsMultiRegionTrail", "S3BucketName", "LogFileValidationEnabled",
+    "CloudWatchLogsLogGroupArn", "KmsKeyId"
+]
+
 def scan_cloudtrail(session, account_id):
     """Scan AWS CloudTrail for security gaps."""
     
     cloudtrail_client = session.client("cloudtrail")
 
     try:
-        trails = cloudtrail_client.describe_trails()["trailList"]
-
-        if not trails:
-            typer.echo("✅ No CloudTrail trails found.")
-            return [], 0, 0, 0, 0
-
-        typer.echo(f"✅ Found {len(trails)} CloudTrail trails")
+        trails = iter_resources(cloudtrail_client, "describe_trails", "trailList", CLOUDTRAIL_TRAIL_FIELDS)
         cloudtrail_results = []
         total_risk = 0
         failed_count = 0
@@ -69,8 +70,14 @@ def scan_cloudtrail(session, account_id):
 
             except Exception as e:
                 failed_count += 1
+                record_scan_failure(trail.get("Name"))
                 typer.echo(f"❌ Error retrieving CloudTrail data for {trail_name}: {e}")
 
+        if not cloudtrail_results and not failed_count:
+            typer.echo("✅ No CloudTrail trails found.")
+            return [], 0, 0, 0, 0
+
+        typer.echo(f"✅ Found {scanned_count + failed_count} CloudTrail trails")
         avg_risk = round(total_risk / scanned_count) if scanned_count > 0 else 0
 
         mitre_recommendations = match_findings_to_tactics("cloudtrail", cloudtrail_results)
@@ -79,4 +86,5 @@ def scan_cloudtrail(session, account_id):
 
     except Exception as e:
         typer.echo(f"❌ Error scanning CloudTrail: {e}")
-        return [], 0, 0, 0, 0
+        record_scan_failure()
+        return [], 0, 0, 1, 0
@@ -1,110 +1,28 @@
 import boto3
 import typer
+from functools import partial
+from aws_scanner.inventory import AccountInventory, get_inventory
+from aws_scanner.regions import scan_regions
+from aws_scanner.utils import iter_resources
+from logger import record_scan_failure
 from threatintel.mitre import match_findings_to_tactics
 
+EC2_INSTANCE_FIELDS = [
+    "InstanceId", "InstanceType", "Tags", "PublicIpAddress", "PrivateIpAddress",
+    "SecurityGroups", "SubnetId", "VpcId", "IamInstanceProfile"
+]
+
 def check_ec2(session, account_id):
     """Scan EC2 instances for security risks with scoring"""
-    ec2_client = session.client("ec2")
 
     try:
-        instances = ec2_client.describe_instances()["Reservations"]
-        if not instances:
-            typer.echo("✅ No running EC2 instances found in region.")
+        ec2_results, total_risk, scanned_count, failed_count = scan_regions(
+            session, account_id, partial(scan_ec2_region, inventory=get_inventory(session, account_id))
+        )
+        if not ec2_results and not failed_count:
+            typer.echo("✅ No running EC2 instances found.")
             return [], 0, 0, 0, 0
 
-        typer.echo(f"✅ Found {sum(len(res['Instances']) for res in instances)} EC2 instances")
-        total_risk = 0
-        ec2_results = []
-        failed_count = 0
-        scanned_count = 0
-
-        for reservation in instances:
-            for instance in reservation["Instances"]:
-                try:
-                    instance_name = next((tag['Value'] for tag in instance.get("Tags", []) if tag["Key"] == "Name"), "N/A")
-                    instance_type = instance["InstanceType"]
-                    public_ip = instance.get("PublicIpAddress", "⛔ No Public IP")
-                    private_ip = instance.get("PrivateIpAddress", "Unknown")
-                    security_groups = instance.get("SecurityGroups", [])
-                    subnet_id = instance.get("SubnetId", "")
-                    open_ports = []
-                    risk_score = 0
-
-                    # --- Public Exposure Check ---
-                    is_public_ip = "PublicIpAddress" in instance
-
-                    allows_inbound_all = False
-                    for sg in security_groups:
-                        sg_id = sg["GroupId"]
-                        sg_details = ec2_client.describe_security_groups(GroupIds=[sg_id])["SecurityGroups"]
-                        for rule in sg_details[0].get("IpPermissions", []):
-                            if "FromPort" in rule:
-                                for ip_range in rule.get("IpRanges", []):
-                                    if ip_range.get("CidrIp") == "0.0.0.0/0":
-                                        allows_inbound_all = True
-                                        open_ports.append(rule["FromPort"])
-
-                    # Subnet route table check
-                    has_igw = False
-                    route_tables = ec2_client.describe_route_tables(
-                        Filters=[{"Name": "association.subnet-id", "Values": [subnet_id]}]
-                    )["RouteTables"]
-                    for rt in route_tables:
-                        for route in rt.get("Routes", []):
-                            if route.get("GatewayId", "").startswith("igw-"):
-                                has_igw = True
-                                break
-
-                    is_fully_public = is_public_ip and allows_inbound_all and has_igw
-
-                    if is_fully_public:
-                        risk_score += 40
-                        if open_ports:
-                            risk_score += 30
-
-                    open_ports_status = f"⚠️ Open Ports: {open_ports}" if open_ports else "✅ No Open Ports"
-                    visibility = "🔥 Public" if is_fully_public else "✅ Private"
-
-                    # --- IAM Role ---
-                    has_iam_role = "✅ Has IAM Role" if "IamInstanceProfile" in instance else "❌ No IAM Role"
-                    if "❌" in has_iam_role:
-                        risk_score += 20
-
-                    risk_score = min(risk_score, 100)
-                    risk_class = (
-                        "risk-high" if risk_score >= 71 else
-                        "risk-medium" if 31 <= risk_score <= 70 else
-                        "risk-low"
-                    )
-                    total_risk += risk_score
-
-                    ec2_results.append({
-                        "instance_name": instance_name,
-                        "instance_type": instance_type,
-                        "public_ip": public_ip,
-                        "private_ip": private_ip,
-                        "is_public": visibility,
-                        "open_ports": open_ports_status,
-                        "iam_role": has_iam_role,
-                        "risk_score": risk_score,
-                        "risk_class": risk_class
-                    })
-
-                    scanned_count += 1
-
-                    typer.echo(f"\n🔹 **Instance Name:** {instance_name}")
-                    typer.echo(f"   - Type: {instance_type}")
-                    typer.echo(f"   - Public IP: {public_ip}")
-                    typer.echo(f"   - Private IP: {private_ip}")
-                    typer.echo(f"   - Visibility: {visibility}")
-                    typer.echo(f"   - {open_ports_status}")
-                    typer.echo(f"   - {has_iam_role}")
-                    typer.echo(f"   ➡️ **Risk Score: {risk_score}/100 ({risk_class})**")
-
-                except Exception as e:
-                    failed_count += 1
-                    typer.echo(f"❌ Error retrieving EC2 Instance data for {instance_name}: {e}")
-
         avg_risk = round(total_risk / scanned_count) if scanned_count > 0 else 0
         typer.echo("✅ EC2 Instances scan completed.")
 
@@ -114,4 +32,132 @@ def check_ec2(session, account_id):
 
     except Exception as e:
         typer.echo(f"❌ Error scanning EC2 instances: {e}")
-        return [], 0, 0, 0, 0
+        record_scan_failure()
+        return [], 0, 0, 1, 0
+
+def scan_ec2_region(session, region, inventory=None):
+    """Scan the EC2 instances of a single region
+
+    Security groups and route tables come from the account's shared EC2 inventory.
+    Instances are only read here, so they are streamed rather than kept in it.
+    """
+    region_inventory = (inventory or AccountInventory(session)).region(region)
+
+    total_risk = 0
+    ec2_results = []
+    failed_count = 0
+    scanned_count = 0
+    igw_by_subnet = None
+
+    instances = iter_resources(region_inventory.client, "describe_instances", "Reservations[].Instances[]", EC2_INSTANCE_FIELDS)
+    for instance in instances:
+        if igw_by_subnet is None:
+            # Region has instances: resolve IGW reachability once from its route tables
+            igw_by_subnet, igw_by_main_table = index_route_tables(region_inventory.get("route_tables"))
+
+        instance_name = next((tag['Value'] for tag in instance.get("Tags", []) if tag["Key"] == "Name"), "N/A")
+        try:
+            sg_rules = []
+            for sg in instance.get("SecurityGroups", []):
+                sg_rules.append(region_inventory.security_group(sg["GroupId"]).get("IpPermissions", []))
+
+            # Subnet route table check (explicit association, else the VPC's main route table)
+            has_igw = igw_by_subnet.get(instance.get("SubnetId", ""), igw_by_main_table.get(instance.get("VpcId"), False))
+
+            finding = score_instance(instance, instance_name, sg_rules, has_igw)
+
+            total_risk += finding["risk_score"]
+            ec2_results.append(finding)
+            scanned_count += 1
+
+            typer.echo(f"\n🔹 **Instance Name:** {instance_name}")
+            typer.echo(f"   - Type: {finding['instance_type']}")
+            typer.echo(f"   - Public IP: {finding['public_ip']}")
+            typer.echo(f"   - Private IP: {finding['private_ip']}")
+            typer.echo(f"   - Visibility: {finding['is_public']}")
+            typer.echo(f"   - {finding['open_ports']}")
+            typer.echo(f"   - {finding['iam_role']}")
+            typer.echo(f"   ➡️ **Risk Score: {finding['risk_score']}/100 ({finding['risk_class']})**")
+
+        except Exception as e:
+            failed_count += 1
+            typer.echo(f"❌ Error retrieving EC2 Instance data for {instance_name}: {e}")
+
+    if igw_by_subnet is None:
+        return [], 0, 0, 0
+
+    api_calls = region_inventory.api_calls
+    typer.echo(f"✅ Found {scanned_count + failed_count} EC2 instances")
+    typer.echo(f"🔢 {sum(api_calls.values())} EC2 API calls in {region} so far (shared inventory): {dict(api_calls)}")
+    return ec2_results, total_risk, scanned_count, failed_count
+
+def score_instance(instance, instance_name, sg_rules, has_igw):
+    """Score one instance from its security group rules and IGW reachability."""
+    public_ip = instance.get("PublicIpAddress", "⛔ No Public IP")
+    private_ip = instance.get("PrivateIpAddress", "Unknown")
+    open_ports = []
+    risk_score = 0
+
+    # --- Public Exposure Check ---
+    is_public_ip = "PublicIpAddress" in instance
+
+    allows_inbound_all = False
+    for rules in sg_rules:
+        for rule in rules:
+            if "FromPort" in rule:
+                for ip_range in rule.get("IpRanges", []):
+                    if ip_range.get("CidrIp") == "0.0.0.0/0":
+                        allows_inbound_all = True
+                        open_ports.append(rule["FromPort"])
+
+    is_fully_public = is_public_ip and allows_inbound_all and has_igw
+
+    if is_fully_public:
+        risk_score += 40
+        if open_ports:
+            risk_score += 30
+
+    open_ports_status = f"⚠️ Open Ports: {open_ports}" if open_ports else "✅ No Open Ports"
+    visibility = "🔥 Public" if is_fully_public else "✅ Private"
+
+    # --- IAM Role ---
+    has_iam_role = "✅ Has IAM Role" if "IamInstanceProfile" in instance else "❌ No IAM Role"
+    if "❌" in has_iam_role:
+        risk_score += 20
+
+    risk_score = min(risk_score, 100)
+    risk_class = (
+        "risk-high" if risk_score >= 71 else
+        "risk-medium" if 31 <= risk_score <= 70 else
+        "risk-low"
+    )
+
+    return {
+        "instance_name": instance_name,
+        "instance_id": instance.get("InstanceId", "N/A"),
+        "instance_type": instance["InstanceType"],
+        "public_ip": public_ip,
+        "private_ip": private_ip,
+        "is_public": visibility,
+        "open_ports": open_ports_status,
+        "iam_role": has_iam_role,
+        "risk_score": risk_score,
+        "risk_class": risk_class
+    }
+
+def index_route_tables(route_tables):
+    """Resolve Internet Gateway reachability from the region's route tables.
+
+    Returns two maps: subnet id -> IGW route in its explicitly associated table, and
+    VPC id -> IGW route in the VPC's main table (used by subnets without an association).
+    """
+    igw_by_subnet = {}
+    igw_by_main_table = {}
+    for rt in route_tables:
+        has_igw = any(route.get("GatewayId", "").startswith("igw-") for route in rt.get("Routes", []))
+        for association in rt.get("Associations", []):
+            if association.get("Main"):
+                igw_by_main_table[rt["VpcId"]] = has_igw
+            elif association.get("SubnetId"):
+                igw_by_subnet[association["SubnetId"]] = has_igw
+    return igw_by_subnet, igw_by_main_table
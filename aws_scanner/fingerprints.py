@@ -0,0 +1,77 @@
+import copy
+import hashlib
+import json
+import threading
+import typer
+from datetime import datetime, timedelta, timezone
+from logger import load_fingerprints, save_fingerprints
+
+# Reused findings expire so that changes the cheap signals cannot see are still picked up
+FINGERPRINT_MAX_AGE = timedelta(days=7)
+
+def fingerprint(*signals):
+    """Hash of a resource's cheap change signals."""
+    return hashlib.sha256(json.dumps(signals, sort_keys=True, default=str).encode()).hexdigest()
+
+class FingerprintCache:
+    """Previous results of one scanner, reused for resources whose fingerprint has not changed.
+
+    A result is whatever the scanner stores to rebuild a finding (IAM keeps the user record
+    and scores it again, so time-based checks stay current). With full_scan=True nothing is
+    reused, but the fingerprints are still refreshed. The stored fingerprints are only
+    written by a scan that consulted the cache, so a scan that took another path (e.g. IAM
+    bulk mode) keeps them. Safe to share between the threads of one scan.
+    """
+
+    def __init__(self, account_id, scan_type, full_scan=False, provider="aws"):
+        self.account_id = account_id
+        self.scan_type = scan_type
+        self.provider = provider
+        self.previous = {}
+        if not full_scan:
+            try:
+                self.previous = load_fingerprints(account_id, scan_type, provider)
+            except Exception as e:
+                typer.echo(f"⚠️ Could not load {scan_type.upper()} fingerprints, scanning everything: {e}")
+        self.current = {}
+        self.reused_count = 0
+        self.consulted = False
+        self._lock = threading.Lock()
+
+    def reuse(self, resource_key, resource_fingerprint):
+        """Return a copy of the previous result if the resource is unchanged, else None."""
+        self.consulted = True
+        entry = self.previous.get(resource_key)
+        if not entry or entry[0] != resource_fingerprint:
+            return None
+        scanned_at = datetime.fromisoformat(entry[2])
+        if datetime.now(timezone.utc) - scanned_at > FINGERPRINT_MAX_AGE:
+            return None
+
+        with self._lock:
+            self.current[resource_key] = entry
+            self.reused_count += 1
+        return copy.deepcopy(entry[1])
+
+    def store(self, resource_key, resource_fingerprint, finding):
+        """Remember the result of a freshly scanned resource."""
+        with self._lock:
+            self.current[resource_key] = (
+                resource_fingerprint, copy.deepcopy(finding), datetime.now(timezone.utc).isoformat()
+            )
+
+    def save(self, replace=True):
+        """Persist the fingerprints of this scan.
+
+        With replace, they become the scanner's fingerprints (resources that disappeared are
+        dropped); otherwise they are merged into the stored ones, for a scan where only some
+        resources went through the cache.
+        """
+        if not self.consulted:
+            return
+        try:
+            save_fingerprints(self.account_id, self.scan_type, self.current, self.provider, replace)
+        except Exception as e:
+            typer.echo(f"⚠️ Could not save {self.scan_type.upper()} fingerprints: {e}")
+        if self.reused_count:
+            typer.echo(f"♻️ Reused previous findings for {self.reused_count} unchanged {self.scan_type} resources.")
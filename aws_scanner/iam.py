@@ -1,116 +1,255 @@
+import csv
+import io
+import time
 import typer
 from auth import auth_aws
 import botocore.exceptions
 from datetime import datetime, timezone
+from aws_scanner.fingerprints import FingerprintCache, fingerprint
+from aws_scanner.utils import iter_resources
+from logger import record_scan_failure
 from threatintel.mitre import match_findings_to_tactics
 
-def check_iam_users(session, account_id):
-    """Scan AWS IAM users and determine their status"""
-    
+ADMIN_POLICIES = ["AdministratorAccess", "PowerUserAccess"]
+CREDENTIAL_REPORT_TIMEOUT = 120  # seconds to wait for AWS to generate the credential report
+
+def check_iam_users(session, account_id, bulk=True, full_scan=False):
+    """Scan AWS IAM users and determine their status
+
+    In bulk mode every user is scored from the credential report plus one paginated
+    get_account_authorization_details call, so the number of API calls does not grow
+    with the number of users. Falls back to per-user calls if the report is unavailable;
+    there, users whose fingerprint is unchanged reuse their previous record unless full_scan
+    (it is scored again, so key ages are always current).
+    """
+
     try:
         iam_client = session.client("iam")
-        users = iam_client.list_users()["Users"]
+        users = None
+        if bulk:
+            try:
+                users = load_bulk_user_records(iam_client)
+            except Exception as e:
+                typer.echo(f"⚠️ IAM bulk mode unavailable ({e}), checking users one by one.")
+        # In bulk mode only users missing from the credential report go through the fingerprints
+        partial_fingerprints = users is not None
+        if users is None:
+            users = iter_resources(iam_client, "list_users", "Users", ["UserName", "CreateDate", "PasswordLastUsed"])
     except Exception as e:
         typer.echo(f"❌ Error scanning AWS IAM: {e}")
-        return [], 0, 0, 0
+        record_scan_failure()
+        return [], 0, 0, 1, 0
 
     user_data = []
     scanned_count = 0
     failed_count = 0
     total_risk = 0
-    risk_score = 0
-    
-    typer.echo(f"✅ Found {len(users)} IAM users") 
-    
-    for user in users:
-        try:
+    fingerprints = FingerprintCache(account_id, "iam", full_scan)
+
+    # users may be a lazy listing: list_users errors surface while iterating
+    try:
+        for user in users:
             username = user["UserName"]
-            created_date = user.get("CreateDate", "N/A")
-            mfa_status = ""
-            old_key_warning = ""
-            admin_status = ""
-            has_password_login = False
-            is_admin = False
-
-            # Check if user is disabled
-            access_keys = iam_client.list_access_keys(UserName=username)["AccessKeyMetadata"]
-            attached_policies = iam_client.list_attached_user_policies(UserName=username)["AttachedPolicies"]
-            groups = iam_client.list_groups_for_user(UserName=username)["Groups"]
-            signing_certs = iam_client.list_signing_certificates(UserName=username)["Certificates"]
-
-            has_active_keys = any(k["Status"] == "Active" for k in access_keys)
             try:
-                iam_client.get_login_profile(UserName=username)
-                has_password_login = True
-            except botocore.exceptions.ClientError:
-                pass
-            in_group = bool(groups)
-            has_cert_auth = bool(signing_certs)
-
-            is_disabled = not has_active_keys and not has_password_login and not in_group and not has_cert_auth
-            status_message = "❌ Disabled User" if is_disabled else "✅ Active User"
-
-            # Only assign risk if user is active
-            mfa_devices = iam_client.list_mfa_devices(UserName=username)["MFADevices"]
-            mfa_status = "✅ MFA Enabled" if mfa_devices else "❌ No MFA"
-            if not mfa_devices and not is_disabled:
-                risk_score += 40
-
-            # Access key age
-            for key in access_keys:
-                if key["Status"] == "Active":
-                    age_days = (datetime.now(timezone.utc) - key["CreateDate"]).days
-                    if age_days > 90 and not is_disabled:
-                        risk_score += 10
-                        old_key_warning = f"⚠️ Access Key {key['AccessKeyId']} is {age_days} days old"
-                    else:
-                        old_key_warning = f"✅ Access Key {key['AccessKeyId']} is {age_days} days old"
-
-            # Admin policy check
-            is_admin = any(p["PolicyName"] in ["AdministratorAccess", "PowerUserAccess"] for p in attached_policies)
-            admin_status = "⚠️ Admin Access Enabled" if is_admin else "✅ No Admin Access"
-            if is_admin and not is_disabled:
-                risk_score += 50
-
-            # Determine risk class
-            risk_level = (
-                "🟢 Low Risk" if risk_score <= 30 else
-                "🟡 Medium Risk" if risk_score <= 60 else
-                "🔴 High Risk"
-            )
-            risk_class = (
-                "risk-low" if risk_score <= 30 else
-                "risk-medium" if risk_score <= 60 else
-                "risk-high"
-            )
-
-            typer.echo(f"\n🔹 **{username}** (Created: {created_date})")
-            typer.echo(f"   - {mfa_status}")
-            if old_key_warning:
-                typer.echo(f"   - {old_key_warning}")
-            if is_admin:
-                typer.echo("   - ⚠️ User has AdministratorAccess permissions")
-            typer.echo(f"   ➡️ **Risk Score: {risk_score}/100 ({risk_level})**")
-
-            user_data.append({
-                "username": username,
-                "status": status_message,
-                "mfa_status": mfa_status,
-                "old_key_warning": old_key_warning,
-                "admin_status": admin_status,
-                "risk_score": risk_score,
-                "risk_class": risk_class
-            })
-            scanned_count += 1
-
-        except Exception as e:
-            failed_count += 1
-            typer.echo(f"❌ Error retrieving IAM user data for {username}: {e}")
-
-    total_risk += risk_score
+                if "has_mfa" in user:
+                    record = user
+                else:
+                    signals = fetch_user_signals(iam_client, user)
+                    user_fingerprint = fingerprint(signals)
+                    record = fingerprints.reuse(username, user_fingerprint)
+                    if record is None:
+                        record = fetch_user_record(iam_client, user, signals)
+                        fingerprints.store(username, user_fingerprint, record)
+                result = score_user(record)
+                risk_score = result["risk_score"]
+                risk_level = result.pop("risk_level")
+
+                typer.echo(f"\n🔹 **{username}** (Created: {user.get('CreateDate', 'N/A')})")
+                typer.echo(f"   - {result['mfa_status']}")
+                if result["old_key_warning"]:
+                    typer.echo(f"   - {result['old_key_warning']}")
+                if "⚠️" in result["admin_status"]:
+                    typer.echo("   - ⚠️ User has AdministratorAccess permissions")
+                typer.echo(f"   ➡️ **Risk Score: {risk_score}/100 ({risk_level})**")
+
+                user_data.append(result)
+                total_risk += risk_score
+                scanned_count += 1
+
+            except Exception as e:
+                failed_count += 1
+                record_scan_failure(username)
+                typer.echo(f"❌ Error retrieving IAM user data for {username}: {e}")
+    except Exception as e:
+        typer.echo(f"❌ Error scanning AWS IAM: {e}")
+        record_scan_failure()
+        return [], 0, 0, 1, 0
+
+    fingerprints.save(replace=not partial_fingerprints)
+    typer.echo(f"✅ Found {scanned_count + failed_count} IAM users")
     avg_risk = round(total_risk / scanned_count) if scanned_count > 0 else 0
     typer.echo("✅ AWS Identities scan completed.")
 
     mitre_recommendations = match_findings_to_tactics("iam", user_data)
 
-    return user_data, avg_risk, scanned_count, failed_count, mitre_recommendations
\ No newline at end of file
+    return user_data, avg_risk, scanned_count, failed_count, mitre_recommendations
+
+def fetch_user_signals(iam_client, user):
+    """Cheap change signals of a user: password use, access keys (with their creation dates),
+    attached policies and MFA devices.
+
+    Group membership, signing certificates and the login profile only decide whether the
+    user counts as disabled and are not part of the fingerprint; FINGERPRINT_MAX_AGE bounds
+    how long a change there can go unnoticed.
+    """
+    username = user["UserName"]
+    return {
+        "password_last_used": user.get("PasswordLastUsed"),
+        "access_keys": iam_client.list_access_keys(UserName=username)["AccessKeyMetadata"],
+        "attached_policies": iam_client.list_attached_user_policies(UserName=username)["AttachedPolicies"],
+        "mfa_devices": iam_client.list_mfa_devices(UserName=username)["MFADevices"],
+    }
+
+def fetch_user_record(iam_client, user, signals=None):
+    """Collect the signals scored for a single user with per-user API calls."""
+    username = user["UserName"]
+    signals = signals or fetch_user_signals(iam_client, user)
+
+    # Check if user is disabled
+    access_keys = signals["access_keys"]
+    attached_policies = signals["attached_policies"]
+    groups = iam_client.list_groups_for_user(UserName=username)["Groups"]
+    signing_certs = iam_client.list_signing_certificates(UserName=username)["Certificates"]
+
+    has_password_login = False
+    try:
+        iam_client.get_login_profile(UserName=username)
+        has_password_login = True
+    except botocore.exceptions.ClientError:
+        pass
+
+    mfa_devices = signals["mfa_devices"]
+
+    return {
+        "UserName": username,
+        "CreateDate": user.get("CreateDate", "N/A"),
+        # Labelled #1/#2 in creation order, like the credential report's key slots, so a
+        # user's finding does not change when the scan falls back from bulk mode
+        "access_keys": [
+            {"label": f"#{n}", "active": key["Status"] == "Active", "created": key["CreateDate"]}
+            for n, key in enumerate(sorted(access_keys, key=lambda key: key["CreateDate"]), start=1)
+        ],
+        "attached_policy_names": [p["PolicyName"] for p in attached_policies],
+        "in_group": bool(groups),
+        "has_cert_auth": bool(signing_certs),
+        "has_password_login": has_password_login,
+        "has_mfa": bool(mfa_devices),
+    }
+
+def load_bulk_user_records(iam_client):
+    """Build the records of every user from the credential report and the account authorization details.
+
+    Users created after the (up to 4 hours old) credential report are returned without
+    report data, so the scan fetches them with per-user calls.
+    """
+    report = {row["user"]: row for row in get_credential_report(iam_client)}
+
+    records = []
+    for user in iter_resources(
+        iam_client, "get_account_authorization_details", "UserDetailList",
+        ["UserName", "CreateDate", "GroupList", "AttachedManagedPolicies"], Filter=["User"]
+    ):
+        row = report.get(user["UserName"])
+        if row is None:
+            records.append({"UserName": user["UserName"], "CreateDate": user.get("CreateDate", "N/A")})
+            continue
+
+        access_keys = [
+            {"label": f"#{n}", "active": row[f"access_key_{n}_active"] == "true", "created": parse_report_time(row[f"access_key_{n}_last_rotated"])}
+            for n in (1, 2)
+            if row[f"access_key_{n}_last_rotated"] != "N/A"
+        ]
+        records.append({
+            "UserName": user["UserName"],
+            "CreateDate": user.get("CreateDate", "N/A"),
+            "access_keys": access_keys,
+            "attached_policy_names": [p["PolicyName"] for p in user.get("AttachedManagedPolicies", [])],
+            "in_group": bool(user.get("GroupList")),
+            "has_cert_auth": any(row[f"cert_{n}_last_rotated"] != "N/A" for n in (1, 2)),
+            "has_password_login": row["password_enabled"] == "true",
+            "has_mfa": row["mfa_active"] == "true",
+        })
+    return records
+
+def get_credential_report(iam_client):
+    """Generate (if needed) and download the IAM credential report, returning its rows as dicts."""
+    deadline = time.monotonic() + CREDENTIAL_REPORT_TIMEOUT
+    while iam_client.generate_credential_report()["State"] != "COMPLETE":
+        if time.monotonic() > deadline:
+            raise TimeoutError("credential report was not generated in time")
+        time.sleep(2)
+
+    content = iam_client.get_credential_report()["Content"]
+    return [row for row in csv.DictReader(io.StringIO(content.decode("utf-8"))) if row["user"] != "<root_account>"]
+
+def parse_report_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def score_user(record):
+    """Score one user record and return its finding (with a risk_level label for the console)."""
+    risk_score = 0
+    old_key_warning = ""
+
+    has_active_keys = any(key["active"] for key in record["access_keys"])
+    is_disabled = (
+        not has_active_keys and not record["has_password_login"]
+        and not record["in_group"] and not record["has_cert_auth"]
+    )
+    status_message = "❌ Disabled User" if is_disabled else "✅ Active User"
+
+    # Only assign risk if user is active
+    mfa_status = "✅ MFA Enabled" if record["has_mfa"] else "❌ No MFA"
+    if not record["has_mfa"] and not is_disabled:
+        risk_score += 40
+
+    # Access key age
+    for key in record["access_keys"]:
+        if key["active"]:
+            created = key["created"]
+            if isinstance(created, str):  # a record reused from the fingerprints store
+                created = datetime.fromisoformat(created)
+            age_days = (datetime.now(timezone.utc) - created).days
+            if age_days > 90 and not is_disabled:
+                risk_score += 10
+                old_key_warning = f"⚠️ Access Key {key['label']} is {age_days} days old"
+            else:
+                old_key_warning = f"✅ Access Key {key['label']} is {age_days} days old"
+
+    # Admin policy check
+    is_admin = any(name in ADMIN_POLICIES for name in record["attached_policy_names"])
+    admin_status = "⚠️ Admin Access Enabled" if is_admin else "✅ No Admin Access"
+    if is_admin and not is_disabled:
+        risk_score += 50
+
+    # Determine risk class
+    risk_level = (
+        "🟢 Low Risk" if risk_score <= 30 else
+        "🟡 Medium Risk" if risk_score <= 60 else
+        "🔴 High Risk"
+    )
+    risk_class = (
+        "risk-low" if risk_score <= 30 else
+        "risk-medium" if risk_score <= 60 else
+        "risk-high"
+    )
+
+    return {
+        "username": record["UserName"],
+        "status": status_message,
+        "mfa_status": mfa_status,
+        "old_key_warning": old_key_warning,
+        "admin_status": admin_status,
+        "risk_score": risk_score,
+        "risk_class": risk_class,
+        "risk_level": risk_level
+    }
@@ -0,0 +1,84 @@
+import threading
+from auth.auth_aws import SharedSession
+from aws_scanner.utils import count_api_calls, iter_resources, project
+
+# EC2-family resources shared by the regional scanners: name -> (operation, result key, fields).
+# Fields are the union of what the scanners read; add to them when a scanner needs more.
+EC2_INVENTORY_RESOURCES = {
+    "vpcs": ("describe_vpcs", "Vpcs", ["VpcId", "CidrBlock", "IsDefault"]),
+    "route_tables": ("describe_route_tables", "RouteTables", ["RouteTableId", "VpcId", "Associations", "Routes"]),
+    "internet_gateways": ("describe_internet_gateways", "InternetGateways", ["InternetGatewayId", "Tags", "Attachments"]),
+    "nat_gateways": ("describe_nat_gateways", "NatGateways", ["NatGatewayId", "Tags", "PublicIp", "State", "VpcId", "SubnetId"]),
+    "security_groups": ("describe_security_groups", "SecurityGroups", ["GroupId", "GroupName", "VpcId", "IpPermissions"]),
+}
+
+_inventories = {}
+_inventories_lock = threading.Lock()
+
+
+class RegionInventory:
+    """EC2-family resources of one account region, each type fetched at most once.
+
+    Resources are fetched on first use and kept for the rest of the run; the lists are
+    shared between scanner threads and must not be modified.
+    """
+
+    def __init__(self, session, region):
+        self.region = region
+        self.client = session.client("ec2", region_name=region)
+        self.api_calls = count_api_calls(self.client)
+        self._resources = {}
+        self._locks = {resource: threading.Lock() for resource in EC2_INVENTORY_RESOURCES}
+        self._security_groups_by_id = None
+        self._security_groups_lock = threading.Lock()
+
+    def get(self, resource):
+        """All resources of a type (a key of EC2_INVENTORY_RESOURCES) in this region."""
+        with self._locks[resource]:
+            if resource not in self._resources:
+                operation, result_key, fields = EC2_INVENTORY_RESOURCES[resource]
+                self._resources[resource] = list(iter_resources(self.client, operation, result_key, fields))
+            return self._resources[resource]
+
+    def security_group(self, group_id):
+        """A security group by GroupId, described on its own if it was created after the inventory."""
+        security_groups = self.get("security_groups")
+        with self._security_groups_lock:
+            if self._security_groups_by_id is None:
+                self._security_groups_by_id = {sg["GroupId"]: sg for sg in security_groups}
+            if group_id in self._security_groups_by_id:
+                return self._security_groups_by_id[group_id]
+
+        # Described outside the lock so other lookups don't wait on the call; racing threads keep the first answer
+        sg = self.client.describe_security_groups(GroupIds=[group_id])["SecurityGroups"][0]
+        with self._security_groups_lock:
+            return self._security_groups_by_id.setdefault(group_id, project(sg, EC2_INVENTORY_RESOURCES["security_groups"][2]))
+
+
+class AccountInventory:
+    """The RegionInventory of every region of one account, created on demand."""
+
+    def __init__(self, session):
+        self.session = session if isinstance(session, SharedSession) else SharedSession(session)
+        self._regions = {}
+        self._lock = threading.Lock()
+
+    def region(self, region):
+        with self._lock:
+            if region not in self._regions:
+                self._regions[region] = RegionInventory(self.session, region)
+            return self._regions[region]
+
+
+def get_inventory(session, account_id):
+    """The inventory of an account for the current run (created from session on first use)."""
+    with _inventories_lock:
+        if account_id not in _inventories:
+            _inventories[account_id] = AccountInventory(session)
+        return _inventories[account_id]
+
+
+def reset_inventory(account_id):
+    """Forget an account's inventory so the next scan fetches fresh data."""
+    with _inventories_lock:
+        _inventories.pop(account_id, None)
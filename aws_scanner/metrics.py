@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+import typer
+import logger
+
+API_METRICS_FILE = "api_metrics.json"
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)  # histogram upper bounds
+SUMMARY_TOP_OPERATIONS = 5
+
+# Error codes AWS uses for throttling (same list botocore's standard retry mode treats as throttles)
+THROTTLING_ERROR_CODES = {
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottledException",
+    "TooManyRequestsException", "ProvisionedThroughputExceededException", "TransactionInProgressException",
+    "RequestLimitExceeded", "BandwidthLimitExceeded", "LimitExceededException", "RequestThrottled",
+    "SlowDown", "PriorRequestNotComplete", "EC2ThrottledException",
+}
+
+_account_metrics = {}
+_account_metrics_lock = threading.Lock()
+
+
+class ApiMetrics:
+    """API call statistics of one account, per service and operation.
+
+    Filled by the botocore event hooks of instrument_session; safe to update from the
+    scanner threads.
+    """
+
+    def __init__(self, account_id):
+        self.account_id = account_id
+        self._lock = threading.Lock()
+        self.operations = {}
+
+    def _stats(self, service, operation):
+        key = (service, operation)
+        if key not in self.operations:
+            self.operations[key] = {
+                "calls": 0, "errors": 0, "retries": 0, "throttles": 0,
+                "latency_ms": {"total": 0.0, "max": 0.0, "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1)},
+            }
+        return self.operations[key]
+
+    def record_call(self, service, operation, latency_ms, retries=0, error_code=None):
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if latency_ms <= bound), len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            stats = self._stats(service, operation)
+            stats["calls"] += 1
+            stats["retries"] += retries
+            if error_code:
+                stats["errors"] += 1
+            latency = stats["latency_ms"]
+            latency["total"] += latency_ms
+            latency["max"] = max(latency["max"], latency_ms)
+            latency["histogram"][bucket] += 1
+
+    def record_throttle(self, service, operation):
+        """Count one throttled attempt (retried or not)."""
+        with self._lock:
+            self._stats(service, operation)["throttles"] += 1
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+
+    def totals(self):
+        with self._lock:
+            stats = list(self.operations.values())
+        return {
+            field: sum(op[field] for op in stats) for field in ("calls", "errors", "retries", "throttles")
+        } | {"latency_ms": round(sum(op["latency_ms"]["total"] for op in stats), 1)}
+
+    def as_dict(self):
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        with self._lock:
+            services = {}
+            for (service, operation), stats in sorted(self.operations.items()):
+                latency = stats["latency_ms"]
+                services.setdefault(service, {})[operation] = {
+                    **{field: stats[field] for field in ("calls", "errors", "retries", "throttles")},
+                    "latency_ms": {
+                        "total": round(latency["total"], 1),
+                        "avg": round(latency["total"] / stats["calls"], 1) if stats["calls"] else 0,
+                        "max": round(latency["max"], 1),
+                        "histogram": dict(zip(labels, latency["histogram"])),
+                    },
+                }
+        return {"account_id": self.account_id, "totals": self.totals(), "services": services}
+
+
+def get_api_metrics(account_id):
+    """The (process-wide) metrics object of an account."""
+    with _account_metrics_lock:
+        if account_id not in _account_metrics:
+            _account_metrics[account_id] = ApiMetrics(account_id)
+        return _account_metrics[account_id]
+
+
+def instrument_session(session, account_id):
+    """Record every API call made by clients of this boto3 session in the account's ApiMetrics.
+
+    Must be called before clients are created: they copy the session's event hooks.
+    """
+    metrics = get_api_metrics(account_id)
+
+    def names(model):
+        return model.service_model.service_name, model.name
+
+    def before_call(model, context, **kwargs):
+        context["cloudcastle_started"] = time.perf_counter()
+
+    def after_call(model, parsed, context, **kwargs):
+        started = context.get("cloudcastle_started")
+        if started is None:
+            return
+        response_metadata = parsed.get("ResponseMetadata", {})
+        metrics.record_call(
+            *names(model),
+            (time.perf_counter() - started) * 1000,
+            retries=response_metadata.get("RetryAttempts", 0),
+            error_code=parsed.get("Error", {}).get("Code"),
+        )
+
+    def after_call_error(model, exception, context, **kwargs):
+        started = context.get("cloudcastle_started")
+        if started is not None:
+            metrics.record_call(*names(model), (time.perf_counter() - started) * 1000, error_code=type(exception).__name__)
+
+    def needs_retry(response, operation, **kwargs):
+        # Called after every attempt; response is (http_response, parsed) unless the request raised
+        if response and response[1].get("Error", {}).get("Code") in THROTTLING_ERROR_CODES:
+            metrics.record_throttle(operation.service_model.service_name, operation.name)
+
+    session.events.register("before-call", before_call)
+    session.events.register("after-call", after_call)
+    session.events.register("after-call-error", after_call_error)
+    session.events.register("needs-retry", needs_retry)
+    return session
+
+
+def write_api_metrics(account_id, provider="aws"):
+    """Write an account's metrics next to its scan logs; returns the path, or None if nothing was recorded."""
+    metrics = get_api_metrics(account_id)
+    if not metrics.operations:
+        return None
+    account_dir = os.path.join(logger.LOGS_DIR, provider, account_id)
+    os.makedirs(account_dir, exist_ok=True)
+    path = os.path.join(account_dir, API_METRICS_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metrics.as_dict(), f, indent=4)
+    os.replace(tmp_path, path)
+    return path
+
+
+def print_api_metrics_summary(account_id):
+    """Print call totals and the operations that took the most time."""
+    metrics = get_api_metrics(account_id)
+    if not metrics.operations:
+        return
+    totals = metrics.totals()
+    typer.echo(
+        f"\n🔢 {totals['calls']} AWS API calls in {totals['latency_ms'] / 1000:.1f}s "
+        f"({totals['errors']} errors, {totals['retries']} retries, {totals['throttles']} throttled)"
+    )
+    hottest = sorted(metrics.operations.items(), key=lambda item: item[1]["latency_ms"]["total"], reverse=True)
+    for (service, operation), stats in hottest[:SUMMARY_TOP_OPERATIONS]:
+        latency = stats["latency_ms"]
+        typer.echo(
+            f"   - {service}:{operation}: {stats['calls']} calls, {latency['total'] / 1000:.1f}s total, "
+            f"avg {latency['total'] / stats['calls']:.0f} ms, max {latency['max']:.0f} ms"
+            + (f", {stats['throttles']} throttled" if stats["throttles"] else "")
+        )
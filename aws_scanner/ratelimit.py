@@ -0,0 +1,159 @@
+import contextvars
+import threading
+import time
+import typer
+from contextlib import contextmanager
+from aws_scanner.metrics import THROTTLING_ERROR_CODES
+
+# (initial, maximum) requests per second per account and service, before adapting
+SERVICE_RATE_LIMITS = {
+    "ec2": (20, 100),
+    "iam": (10, 20),
+    "s3": (50, 200),
+    "rds": (10, 40),
+}
+DEFAULT_RATE_LIMIT = (20, 50)
+MIN_RATE = 1.0             # never slow a service down further than this
+THROTTLE_BACKOFF = 0.5     # multiply the rate by this when throttled...
+THROTTLE_COOLDOWN = 1.0    # ...at most once per this many seconds (concurrent throttles are one signal)
+RATE_STEP = 0.1            # add this to the rate on every successful attempt, up to the maximum
+
+# Throttled attempts are retried by botocore's standard mode (exponential backoff with jitter)
+RETRY_MODE = "standard"
+MAX_API_ATTEMPTS = 10
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+# The scan type making the current API calls, and the throttles counted per (account, scan type)
+_current_scan = contextvars.ContextVar("cloudcastle_scan", default=None)
+_scan_throttles = {}
+
+
+class AdaptiveRateLimiter:
+    """Token bucket shared by every client of one account session for one AWS service.
+
+    The rate halves when calls get throttled and creeps back up with successful ones
+    (AIMD), so parallel scanners settle just under what the account allows.
+    """
+
+    def __init__(self, rate, max_rate):
+        self.rate = float(rate)
+        self.initial_rate = float(rate)
+        self.max_rate = float(max_rate)
+        self.tokens = self.rate
+        self.updated = time.monotonic()
+        self.throttles = 0
+        self.waited = 0.0
+        self.last_backoff = float("-inf")
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1  # reserve a token; a negative balance is the queue ahead of us
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+
+    def on_throttle(self):
+        with self._lock:
+            self.throttles += 1
+            now = time.monotonic()
+            if now - self.last_backoff >= THROTTLE_COOLDOWN:
+                self.last_backoff = now
+                self.rate = max(MIN_RATE, self.rate * THROTTLE_BACKOFF)
+                self.tokens = min(self.tokens, 0.0)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + RATE_STEP)
+
+
+def get_rate_limiter(account_id, service):
+    """The limiter of an account and service (service as a hyphenized botocore service id)."""
+    key = (account_id, service)
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = AdaptiveRateLimiter(*SERVICE_RATE_LIMITS.get(service, DEFAULT_RATE_LIMIT))
+        return _limiters[key]
+
+
+@contextmanager
+def scan_throttles(scan_type):
+    """Count the throttled calls made inside this block (and in in_scan_context workers) for scan_type."""
+    token = _current_scan.set(scan_type)
+    try:
+        yield
+    finally:
+        _current_scan.reset(token)
+
+
+def in_scan_context(fn):
+    """Wrap fn for executor threads so the calls it makes count for the caller's scan."""
+    context = contextvars.copy_context()
+    return lambda *args: context.copy().run(fn, *args)
+
+
+def throttle_count(account_id, scan_type):
+    """Throttled calls made by a scan of an account since the last reset_rate_limit_stats."""
+    with _limiters_lock:
+        return _scan_throttles.get((account_id, scan_type), 0)
+
+
+def reset_rate_limit_stats(account_id):
+    """Start counting an account's throttles and wait time from zero; the learned rates are kept."""
+    with _limiters_lock:
+        for (account, _), limiter in _limiters.items():
+            if account == account_id:
+                with limiter._lock:
+                    limiter.throttles = 0
+                    limiter.waited = 0.0
+        for key in [key for key in _scan_throttles if key[0] == account_id]:
+            del _scan_throttles[key]
+
+
+def install_rate_limiter(session, account_id):
+    """Rate limit every client of this boto3 session and retry throttled calls.
+
+    Must be called before clients are created: they copy the session's event hooks
+    and configuration.
+    """
+    botocore_session = session._session
+    botocore_session.set_config_variable("retry_mode", RETRY_MODE)
+    botocore_session.set_config_variable("max_attempts", MAX_API_ATTEMPTS)
+
+    def before_send(event_name, **kwargs):
+        # event_name is "before-send.<service id>.<operation>"; runs before every attempt
+        get_rate_limiter(account_id, event_name.split(".")[1]).acquire()
+
+    def needs_retry(response, operation, **kwargs):
+        limiter = get_rate_limiter(account_id, operation.service_model.service_id.hyphenize())
+        if response and response[1].get("Error", {}).get("Code") in THROTTLING_ERROR_CODES:
+            limiter.on_throttle()
+            scan_type = _current_scan.get()
+            if scan_type:
+                with _limiters_lock:
+                    _scan_throttles[(account_id, scan_type)] = _scan_throttles.get((account_id, scan_type), 0) + 1
+        elif response:
+            limiter.on_success()
+
+    session.events.register("before-send", before_send)
+    session.events.register("needs-retry", needs_retry)
+    return session
+
+
+def print_rate_limit_summary(account_id):
+    """Print the services of an account that were throttled and the rate they settled at."""
+    with _limiters_lock:
+        limiters = [(service, limiter) for (account, service), limiter in _limiters.items() if account == account_id]
+    for service, limiter in sorted(limiters, key=lambda item: item[0]):
+        if limiter.throttles:
+            typer.echo(
+                f"🚦 {service}: {limiter.throttles} throttled calls retried, rate limited to {limiter.rate:.1f} req/s "
+                f"(started at {limiter.initial_rate:.0f}), {limiter.waited:.1f}s spent waiting"
+            )
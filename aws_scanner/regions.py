@@ -0,0 +1,105 @@
+import threading
+import typer
+from concurrent.futures import ThreadPoolExecutor
+from auth.auth_aws import SharedSession, load_aws_config
+from aws_scanner.ratelimit import in_scan_context
+from logger import capture_output, emit, record_scan_failure
+
+REGION_WORKERS = 8  # regions scanned at the same time by a regional scanner
+DEFAULT_REGION = "us-east-1"
+
+_scan_regions_cache = {}
+_scan_regions_lock = threading.Lock()  # guards the cache and _account_locks
+_account_locks = {}
+
+def get_scan_regions(session, account_id):
+    """Regions to scan for an account.
+
+    Uses the account's "regions" allow-list from cloudcastle_config.json when present,
+    otherwise every region enabled for the account (describe_regions). The answer is
+    cached per account so the regional scanners only discover regions once.
+    """
+    with _scan_regions_lock:
+        # One lock per account: its scanners discover the regions once, other accounts don't wait on the call
+        account_lock = _account_locks.setdefault(account_id, threading.Lock())
+
+    with account_lock:
+        with _scan_regions_lock:
+            if account_id in _scan_regions_cache:
+                return _scan_regions_cache[account_id]
+
+        regions = next(
+            (acct["regions"] for acct in load_aws_config() if acct.get("id") == account_id and acct.get("regions")),
+            None
+        )
+        if not regions:
+            ec2_client = session.client("ec2", region_name=session.region_name or DEFAULT_REGION)
+            regions = [region["RegionName"] for region in ec2_client.describe_regions()["Regions"]]
+
+        with _scan_regions_lock:
+            return _scan_regions_cache.setdefault(account_id, sorted(regions))
+
+def set_scan_regions(account_id, regions):
+    """Pin the regions scanned for an account, overriding its allow-list and region discovery."""
+    with _scan_regions_lock:
+        _scan_regions_cache[account_id] = sorted(regions)
+
+def scan_regions(session, account_id, scan_region, max_workers=REGION_WORKERS):
+    """Run a regional scanner in every scan region concurrently and merge the outcome.
+
+    scan_region(session, region) returns (results, total_risk, scanned_count, failed_count).
+    Results are tagged with their region and merged in region order; each region's output
+    is printed as one block, and regions without resources only show up in a summary line.
+    A region whose scanner raised counts as one failed resource, so callers (and the run
+    store) can tell a scan error from an empty account; regions with failures are recorded
+    with record_scan_failure so only they are left out of run comparisons.
+    """
+    if not isinstance(session, SharedSession):
+        session = SharedSession(session)
+    regions = get_scan_regions(session, account_id)
+
+    def run(region):
+        with capture_output() as output:
+            try:
+                outcome = scan_region(session, region)
+            except Exception as e:
+                typer.echo(f"❌ Error scanning region {region}: {e}")
+                outcome = None
+        return output.getvalue(), outcome
+
+    merged_results = []
+    total_risk = 0
+    scanned_count = 0
+    failed_count = 0
+    empty_regions = []
+    failed_regions = []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(regions)))) as executor:
+        for region, (output, outcome) in zip(regions, executor.map(in_scan_context(run), regions)):
+            if outcome and not outcome[0] and not outcome[3]:
+                empty_regions.append(region)
+                continue
+
+            typer.echo(f"\n🌍 Region: {region}")
+            emit(output)
+            if not outcome or outcome[3]:
+                record_scan_failure(region)  # the other regions still count as scanned
+            if not outcome:
+                failed_regions.append(region)
+                failed_count += 1
+                continue
+
+            results, region_risk, region_scanned, region_failed = outcome
+            merged_results.extend({"region": region, **item} for item in results)
+            total_risk += region_risk
+            scanned_count += region_scanned
+            failed_count += region_failed
+
+    if empty_regions:
+        typer.echo(f"✅ Nothing found in {len(empty_regions)} of {len(regions)} regions.")
+    if failed_regions:
+        typer.echo(f"❌ Could not scan {len(failed_regions)} of {len(regions)} regions: {', '.join(failed_regions)}")
+        if len(failed_regions) == len(regions):
+            record_scan_failure()  # nothing was scanned: the scan failed as a whole
+
+    return merged_results, total_risk, scanned_count, failed_count
@@ -1,5 +1,7 @@
 import boto3
 import typer
+from aws_scanner.utils import iter_resources
+from logger import record_scan_failure
 from threatintel.mitre import match_findings_to_tactics
 
 def scan_route53(session, account_id):
@@ -10,14 +12,7 @@ def scan_route53(session, account_id):
         total_risk = 0
         scanned_count = 0
         failed_count = 0
-        response = route53_client.list_hosted_zones()
-        domains = response.get("HostedZones", [])
-        
-        if not domains:
-            typer.echo("✅ No Route 53 domains found.")
-            return [], 0, 0, 0, 0
-
-        typer.echo(f"✅ Found {len(domains)} Route 53 domains")
+        domains = iter_resources(route53_client, "list_hosted_zones", "HostedZones", ["Name", "Config"])
         route53_results = []
 
         for domain in domains:
@@ -43,8 +38,14 @@ def scan_route53(session, account_id):
 
             except Exception as e:
                 failed_count += 1
+                record_scan_failure(domain.get("Name"))
                 typer.echo(f"❌ Error retrieving route53 data for {domain_name}: {e}")
 
+        if not route53_results and not failed_count:
+            typer.echo("✅ No Route 53 domains found.")
+            return [], 0, 0, 0, 0
+
+        typer.echo(f"✅ Found {scanned_count + failed_count} Route 53 domains")
         avg_risk = round(total_risk / scanned_count) if scanned_count > 0 else 0 
 
         mitre_recommendations = match_findings_to_tactics("route53", route53_results)
@@ -53,4 +54,5 @@ def scan_route53(session, account_id):
 
     except Exception as e:
         typer.echo(f"❌ Error scanning Route 53: {e}")
-        return [], 0, 0, 0, 0
+        record_scan_failure()
+        return [], 0, 0, 1, 0
@@ -0,0 +1,36 @@
+import jmespath
+from collections import Counter
+
+def iter_resources(client, operation, result_key, fields=None, **kwargs):
+    """Stream the resources returned by an AWS list/describe call, one at a time.
+
+    Pages are fetched lazily with the operation's paginator (single call when the
+    operation has none). result_key is a JMESPath expression selecting the resources
+    of a page, e.g. "Reservations[].Instances[]". When fields are given, each resource
+    is projected down to those keys so only what the scanner needs stays in memory.
+    """
+    if client.can_paginate(operation):
+        pages = client.get_paginator(operation).paginate(**kwargs)
+    else:
+        pages = [getattr(client, operation)(**kwargs)]
+
+    for page in pages:
+        for resource in jmespath.search(result_key, page) or []:
+            yield project(resource, fields) if fields else resource
+
+def project(resource, fields):
+    """Keep only the given keys of a resource dict (missing keys stay missing)."""
+    return {field: resource[field] for field in fields if field in resource}
+
+def count_api_calls(client):
+    """Count the API calls made through a boto3 client, per operation name.
+
+    Returns a Counter that keeps updating as the client is used.
+    """
+    calls = Counter()
+
+    def record_call(model, **kwargs):
+        calls[model.name] += 1
+
+    client.meta.events.register("before-parameter-build", record_call)
+    return calls
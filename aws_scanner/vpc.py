@@ -1,67 +1,78 @@
 import typer
+from functools import partial
+from aws_scanner.inventory import AccountInventory, get_inventory
+from aws_scanner.regions import scan_regions
+from logger import record_scan_failure
 from threatintel.mitre import match_findings_to_tactics
 
 def scan_vpc(session, account_id):
     """Scan AWS VPCs for exposure risks"""
-    ec2_client = session.client("ec2")
 
     try:
-        vpcs = ec2_client.describe_vpcs()["Vpcs"]
-        total_risk = 0
-        scanned_count = 0
-        failed_count = 0
-
-        if not vpcs:
+        vpc_results, total_risk, scanned_count, failed_count = scan_regions(
+            session, account_id, partial(scan_vpc_region, inventory=get_inventory(session, account_id))
+        )
+        if not vpc_results and not failed_count:
             typer.echo("✅ No VPCs found.")
             return [], 0, 0, 0, 0
 
-        typer.echo(f"✅ Found {len(vpcs)} VPCs")
-        vpc_results = []
+        avg_risk = round(total_risk / scanned_count) if scanned_count > 0 else 0
+        typer.echo("✅ VPC scan completed.")
+
+        mitre_recommendations = match_findings_to_tactics("vpc", vpc_results)
 
-        for vpc in vpcs:
-            try:
-                vpc_id = vpc["VpcId"]
-                cidr_block = vpc["CidrBlock"]
-                is_default = vpc.get("IsDefault", False)
-                risk_score = 0
+        return vpc_results, avg_risk, scanned_count, failed_count, mitre_recommendations
 
-                # Check if VPC is publicly routable
-                is_public = cidr_block.startswith("0.")  # Rough check for public ranges
-                if is_public:
-                    risk_score += 40  # Public VPC = high risk
+    except Exception as e:
+        typer.echo(f"❌ Error scanning VPCs: {e}")
+        record_scan_failure()
+        return [], 0, 0, 1, 0
 
+def scan_vpc_region(session, region, inventory=None):
+    """Scan the VPCs of a single region (read from the account's shared EC2 inventory)"""
+    vpcs = (inventory or AccountInventory(session)).region(region).get("vpcs")
+    total_risk = 0
+    scanned_count = 0
+    failed_count = 0
+    vpc_results = []
 
-                total_risk += risk_score
+    for vpc in vpcs:
+        try:
+            vpc_id = vpc["VpcId"]
+            cidr_block = vpc["CidrBlock"]
+            is_default = vpc.get("IsDefault", False)
+            risk_score = 0
 
-                risk_class = "risk-high" if risk_score > 60 else "risk-medium" if risk_score > 30 else "risk-low"
-                
-                vpc_results.append({
-                    "vpc_id": vpc_id,
-                    "cidr_block": cidr_block,
-                    "is_default": "✅ Default VPC" if is_default else "❌ Non-Default",
-                    "is_public": "✅ Public" if is_public else "🔒 Private",
-                    "risk_score": risk_score,
-                    "risk_class": risk_class
-                })
+            # Check if VPC is publicly routable
+            is_public = cidr_block.startswith("0.")  # Rough check for public ranges
+            if is_public:
+                risk_score += 40  # Public VPC = high risk
 
-                typer.echo(f"\n🔹 **VPC ID:** {vpc_id}")
-                typer.echo(f"   - CIDR Block: {cidr_block}")
-                typer.echo(f"   - { '✅ Public' if is_public else '🔒 Private' }")
-                typer.echo(f"   ➡️ **Risk Score: {risk_score}/100 ({risk_class})**")
 
-                scanned_count += 1
-                
-            except Exception as e:
-                failed_count += 1
-                typer.echo(f"❌ Error retrieving VPC data for {vpc_id}: {e}")
+            total_risk += risk_score
 
-        avg_risk = round(total_risk / scanned_count) if scanned_count > 0 else 0
-        typer.echo("✅ VPC scan completed.")
+            risk_class = "risk-high" if risk_score > 60 else "risk-medium" if risk_score > 30 else "risk-low"
+            
+            vpc_results.append({
+                "vpc_id": vpc_id,
+                "cidr_block": cidr_block,
+                "is_default": "✅ Default VPC" if is_default else "❌ Non-Default",
+                "is_public": "✅ Public" if is_public else "🔒 Private",
+                "risk_score": risk_score,
+                "risk_class": risk_class
+            })
 
-        mitre_recommendations = match_findings_to_tactics("vpc", vpc_results)
+            typer.echo(f"\n🔹 **VPC ID:** {vpc_id}")
+            typer.echo(f"   - CIDR Block: {cidr_block}")
+            typer.echo(f"   - { '✅ Public' if is_public else '🔒 Private' }")
+            typer.echo(f"   ➡️ **Risk Score: {risk_score}/100 ({risk_class})**")
 
-        return vpc_results, avg_risk, scanned_count, failed_count
+            scanned_count += 1
+            
+        except Exception as e:
+            failed_count += 1
+            typer.echo(f"❌ Error retrieving VPC data for {vpc_id}: {e}")
 
-    except Exception as e:
-        typer.echo(f"❌ Error scanning VPCs: {e}")
-        return [], 0, 0, 0, 0
\ No newline at end of file
+    if vpc_results or failed_count:
+        typer.echo(f"✅ Found {scanned_count + failed_count} VPCs")
+    return vpc_results, total_risk, scanned_count, failed_count
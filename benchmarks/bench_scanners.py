@@ -0,0 +1,171 @@
+"""Offline benchmarks of the AWS scanners against synthetic accounts.
+
+    python benchmarks/bench_scanners.py --sizes 10,1000,20000
+    python benchmarks/bench_scanners.py --compare benchmarks/results/<earlier run>.json
+
+Every scanner runs against a SyntheticFleet whose API calls are answered locally, so
+the numbers only reflect CloudCastle's own work (plus botocore's request handling).
+"""
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import typer
+import logger
+from aws_scanner.ec2 import check_ec2
+from aws_scanner.iam import check_iam_users
+from aws_scanner.s3 import scan_s3
+from benchmarks.fleet import SyntheticFleet, fleet_session
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+SCANNERS = {
+    "ec2": check_ec2,
+    "s3": scan_s3,
+    "iam": partial(check_iam_users, bulk=True, full_scan=True),
+    "iam-per-user": partial(check_iam_users, bulk=False, full_scan=True),
+}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the scanners' console output (from every thread) during a measurement."""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def run_scanner(scanner, fleet, run_number, trace_memory=False):
+    """Run one scanner once. Returns (seconds, findings, calls, peak_bytes)."""
+    session, calls = fleet_session(fleet)
+    account_id = f"bench-{scanner}-{fleet.size}-{run_number}"  # fresh region cache per run
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with quiet():
+            started = time.perf_counter()
+            results = SCANNERS[scanner](session, account_id)[0]
+            elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return elapsed, len(results), calls, peak
+
+
+def benchmark(scanner, size, repeat=1):
+    """Time a scanner on a fleet of the given size (best of repeat), then measure its peak memory."""
+    fleet = SyntheticFleet(size)
+    timings = []
+    for run_number in range(repeat):
+        elapsed, findings, calls, _ = run_scanner(scanner, fleet, run_number)
+        timings.append(elapsed)
+
+    # tracemalloc slows everything down, so memory gets a run of its own
+    _, _, _, peak = run_scanner(scanner, fleet, repeat, trace_memory=True)
+
+    api_calls = {}
+    for (service, operation), count in sorted(calls.items()):
+        api_calls.setdefault(service, {})[operation] = count
+    wall = min(timings)
+    return {
+        "scanner": scanner,
+        "size": size,
+        "wall_seconds": round(wall, 4),
+        "findings": findings,
+        "findings_per_second": round(findings / wall, 1) if wall else None,
+        "api_calls": api_calls,
+        "api_call_total": sum(calls.values()),
+        "peak_memory_mb": round(peak / (1024 * 1024), 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results):
+    print(f"\n{'scanner':<14}{'size':>8}{'wall s':>10}{'findings/s':>12}{'API calls':>11}{'peak MB':>9}")
+    for result in results:
+        print(
+            f"{result['scanner']:<14}{result['size']:>8}{result['wall_seconds']:>10.3f}"
+            f"{result['findings_per_second'] or 0:>12.0f}{result['api_call_total']:>11}{result['peak_memory_mb']:>9.1f}"
+        )
+
+
+def print_comparison(baseline, results):
+    """Side by side view of two benchmark files, matched on (scanner, size)."""
+    previous = {(result["scanner"], result["size"]): result for result in baseline["results"]}
+    print(f"\n🔎 Compared with {baseline['commit']} ({baseline['created_at']}):")
+    for result in results:
+        old = previous.get((result["scanner"], result["size"]))
+        if old is None:
+            continue
+        wall_change = (result["wall_seconds"] / old["wall_seconds"] - 1) * 100 if old["wall_seconds"] else 0
+        print(
+            f"   {result['scanner']:<14}{result['size']:>8}  "
+            f"wall {old['wall_seconds']:.3f}s → {result['wall_seconds']:.3f}s ({wall_change:+.0f}%)  "
+            f"API calls {old['api_call_total']} → {result['api_call_total']}  "
+            f"peak {old['peak_memory_mb']:.1f} → {result['peak_memory_mb']:.1f} MB"
+        )
+
+
+def main(
+    sizes: str = typer.Option("10,1000,20000", help="Comma-separated resource counts per synthetic account."),
+    scanners: str = typer.Option(",".join(SCANNERS), help="Comma-separated scanners to run."),
+    repeat: int = typer.Option(1, help="Timed runs per scanner and size (the best one is kept)."),
+    output: str = typer.Option(RESULTS_DIR, help="Directory for the JSON results."),
+    compare: str = typer.Option(None, help="Earlier results file to compare against."),
+):
+    """Benchmark the AWS scanners offline and save the results as JSON."""
+    selected = [name.strip() for name in scanners.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in SCANNERS]
+    if unknown:
+        raise typer.BadParameter(f"unknown scanner(s) {', '.join(unknown)}; expected {', '.join(SCANNERS)}")
+
+    results = []
+    # Scanners write fingerprints to the results store; keep that away from the real logs
+    with tempfile.TemporaryDirectory() as logs_dir:
+        logger.LOGS_DIR = logs_dir
+        for size in [int(size) for size in sizes.split(",")]:
+            for scanner in selected:
+                print(f"⏱️ {scanner} on {size} resources...")
+                results.append(benchmark(scanner, size, repeat))
+
+    print_results(results)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "results": results,
+    }
+    os.makedirs(output, exist_ok=True)
+    path = os.path.join(output, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📝 Results saved to {path}")
+
+    if compare:
+        with open(compare, "r", encoding="utf-8") as f:
+            print_comparison(json.load(f), results)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,76 @@
+"""Cold start benchmark of the CloudCastle CLI.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget 0.5 --repeat 10
+
+Each entry point is started in a fresh interpreter several times; the best time of each
+must stay within the budget, otherwise the script exits with status 1. The slowest
+imports of every entry point are listed to show where the time goes.
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+
+import typer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points whose startup must stay fast: name -> arguments to the interpreter
+STARTUP_COMMANDS = {
+    "cli --help": ["cloudcastle.py", "--help"],
+    "menu import": ["-c", "import menu"],
+    "runs --help": ["cloudcastle.py", "runs", "--help"],
+}
+STARTUP_BUDGET_SECONDS = 1.0
+SLOWEST_IMPORTS = 5
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def run_once(args, import_time=False):
+    """Start a fresh interpreter; returns (seconds, stderr)."""
+    command = [sys.executable] + (["-X", "importtime"] if import_time else []) + args
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONIOENCODING": "utf-8"})
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} exited with {completed.returncode}: {completed.stderr.strip()[-500:]}")
+    return elapsed, completed.stderr
+
+
+def slowest_imports(args, count=SLOWEST_IMPORTS):
+    """Top-level imports of an entry point with their cumulative time in ms, slowest first."""
+    _, stderr = run_once(args, import_time=True)
+    imports = [
+        (match.group(3), int(match.group(1)) / 1000)
+        for match in map(IMPORT_TIME_LINE.match, stderr.splitlines())
+        if match and not match.group(2)  # no indent: imported by the entry point itself
+    ]
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:count]
+
+
+def main(
+    budget: float = typer.Option(STARTUP_BUDGET_SECONDS, help="Maximum seconds for the best cold start of each entry point."),
+    repeat: int = typer.Option(5, help="Starts per entry point (the best one is kept)."),
+):
+    """Time the cold start of the CLI entry points and fail when one is over budget."""
+    over_budget = []
+    print(f"{'entry point':<16}{'best s':>8}{'median s':>10}  slowest imports (ms)")
+    for name, args in STARTUP_COMMANDS.items():
+        timings = sorted(run_once(args)[0] for _ in range(max(1, repeat)))
+        best, median = timings[0], timings[len(timings) // 2]
+        imports = ", ".join(f"{module} {ms:.0f}" for module, ms in slowest_imports(args))
+        print(f"{name:<16}{best:>8.3f}{median:>10.3f}  {imports}")
+        if best > budget:
+            over_budget.append(name)
+
+    if over_budget:
+        print(f"\n❌ Over the {budget:.2f}s startup budget: {', '.join(over_budget)}")
+        raise typer.Exit(code=1)
+    print(f"\n✅ Every entry point starts within {budget:.2f}s.")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,238 @@
+"""Synthetic AWS accounts answered locally, so the scanners can be benchmarked offline."""
+import csv
+import io
+import random
+import threading
+import boto3
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from botocore.exceptions import ClientError
+
+FLEET_REGIONS = ["us-east-1", "eu-west-1", "ap-southeast-2"]
+EC2_PAGE_SIZE = 1000  # items per page when the caller does not set MaxResults
+IAM_PAGE_SIZE = 100   # IAM's default MaxItems
+
+
+class _Response:
+    """Stand-in for the HTTP response botocore would have received."""
+    status_code = 200
+    headers = {}
+    content = b""
+    raw = None
+
+
+def _client_error(code, operation):
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+def _page(items, params, key, token_in, token_out, page_size, truncated_flag=False):
+    """Serve one page of items the way the AWS APIs do (NextToken / Marker pagination)."""
+    start = int(params.get(token_in) or 0)
+    size = params.get("MaxResults") or params.get("MaxItems") or page_size
+    response = {key: items[start:start + size]}
+    if start + size < len(items):
+        response[token_out] = str(start + size)
+        if truncated_flag:
+            response["IsTruncated"] = True
+    return response
+
+
+class SyntheticFleet:
+    """An account with `size` EC2 instances, S3 buckets and IAM users.
+
+    Resources are generated from a seed, so every run (and every commit) sees the same
+    account. Roughly a third of everything is risky, so every scoring path is exercised.
+    """
+
+    def __init__(self, size, regions=FLEET_REGIONS, seed=0):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        self.size = size
+        self.regions = list(regions)
+
+        # --- EC2: instances spread over the regions, one security group per 10 instances ---
+        self.instances = {region: [] for region in self.regions}
+        self.security_groups = {region: [] for region in self.regions}
+        self.route_tables = {region: [] for region in self.regions}
+        for index, region in enumerate(self.regions):
+            vpc_id = f"vpc-{index:04d}"
+            subnets = [f"subnet-{index:02d}{n:02d}" for n in range(4)]
+            self.route_tables[region] = [
+                {"RouteTableId": f"rtb-{index}-main", "VpcId": vpc_id, "Associations": [{"Main": True}], "Routes": [{"GatewayId": "local"}]},
+                {"RouteTableId": f"rtb-{index}-public", "VpcId": vpc_id, "Associations": [{"SubnetId": subnet} for subnet in subnets[:2]], "Routes": [{"GatewayId": f"igw-{index:04d}"}]},
+            ]
+        for n in range(size):
+            region = self.regions[n % len(self.regions)]
+            region_index = self.regions.index(region)
+            groups = self.security_groups[region]
+            if len(groups) <= len(self.instances[region]) // 10:
+                open_to_world = rng.random() < 0.3
+                groups.append({
+                    "GroupId": f"sg-{region_index}{len(groups):06d}",
+                    "IpPermissions": [{
+                        "FromPort": rng.choice([22, 80, 443, 3389]),
+                        "ToPort": 443,
+                        "IpRanges": [{"CidrIp": "0.0.0.0/0" if open_to_world else "10.0.0.0/8"}],
+                    }],
+                })
+            instance = {
+                "InstanceId": f"i-{n:017x}",
+                "InstanceType": rng.choice(["t3.micro", "m5.large", "c6i.xlarge"]),
+                "Tags": [{"Key": "Name", "Value": f"bench-{n}"}],
+                "PrivateIpAddress": f"10.{region_index}.{n // 250 % 250}.{n % 250}",
+                "SecurityGroups": [{"GroupId": rng.choice(groups)["GroupId"]}],
+                "SubnetId": f"subnet-{region_index:02d}{rng.randrange(4):02d}",
+                "VpcId": f"vpc-{region_index:04d}",
+            }
+            if rng.random() < 0.5:
+                instance["PublicIpAddress"] = f"203.0.{n // 250 % 250}.{n % 250}"
+            if rng.random() < 0.7:
+                instance["IamInstanceProfile"] = {"Arn": f"arn:aws:iam::000000000000:instance-profile/bench-{n}"}
+            self.instances[region].append(instance)
+
+        # --- S3 ---
+        self.buckets = {}
+        for n in range(size):
+            self.buckets[f"bench-bucket-{n}"] = {
+                "region": rng.choice(self.regions),
+                "public_acl": rng.random() < 0.05,
+                "public_access_block": None if rng.random() < 0.2 else rng.random() < 0.9,
+                "policy": None if rng.random() < 0.8 else '{"Statement": [{"Principal": "*"}]}' if rng.random() < 0.25 else '{"Statement": []}',
+                "logging": rng.random() < 0.3,
+            }
+
+        # --- IAM ---
+        self.users = []
+        for n in range(size):
+            self.users.append({
+                "UserName": f"bench-user-{n}",
+                "CreateDate": now - timedelta(days=rng.randrange(1, 1000)),
+                "access_keys": [
+                    {"AccessKeyId": f"AKIA{n:08d}{k}", "Status": "Active" if rng.random() < 0.8 else "Inactive", "CreateDate": now - timedelta(days=rng.randrange(1, 400))}
+                    for k in range(rng.choice([0, 1, 1, 2]))
+                ],
+                "policies": ["AdministratorAccess"] if rng.random() < 0.05 else ["ReadOnlyAccess"],
+                "groups": ["developers"] if rng.random() < 0.5 else [],
+                "mfa": rng.random() < 0.6,
+                "password": rng.random() < 0.7,
+                "certificate": rng.random() < 0.02,
+            })
+        self.users_by_name = {user["UserName"]: user for user in self.users}
+        # Listings are built once so serving a page stays cheap next to the scanner's own work
+        self.user_listing = [
+            {"UserName": u["UserName"], "CreateDate": u["CreateDate"], "Path": "/", "UserId": "A" * 16, "Arn": "arn:aws:iam::000000000000:user/x"}
+            for u in self.users
+        ]
+        self.user_details = [
+            {"UserName": u["UserName"], "CreateDate": u["CreateDate"], "GroupList": u["groups"], "AttachedManagedPolicies": [{"PolicyName": name, "PolicyArn": "x"} for name in u["policies"]]}
+            for u in self.users
+        ]
+        self.bucket_listing = [{"Name": name, "CreationDate": now} for name in self.buckets]
+
+        self.handlers = {
+            "DescribeRegions": lambda params, region: {"Regions": [{"RegionName": name} for name in self.regions]},
+            "DescribeInstances": self._describe_instances,
+            "DescribeSecurityGroups": self._describe_security_groups,
+            "DescribeRouteTables": lambda params, region: _page(self.route_tables.get(region, []), params, "RouteTables", "NextToken", "NextToken", EC2_PAGE_SIZE),
+            "ListBuckets": lambda params, region: {"Buckets": self.bucket_listing},
+            "GetBucketAcl": self._get_bucket_acl,
+            "GetBucketLocation": lambda params, region: {"LocationConstraint": None if self.buckets[params["Bucket"]]["region"] == "us-east-1" else self.buckets[params["Bucket"]]["region"]},
+            "GetPublicAccessBlock": self._get_public_access_block,
+            "GetBucketPolicy": self._get_bucket_policy,
+            "GetBucketLogging": lambda params, region: {"LoggingEnabled": {"TargetBucket": "logs", "TargetPrefix": params["Bucket"]}} if self.buckets[params["Bucket"]]["logging"] else {},
+            "ListUsers": lambda params, region: _page(self.user_listing, params, "Users", "Marker", "Marker", IAM_PAGE_SIZE, truncated_flag=True),
+            "ListAccessKeys": lambda params, region: {"AccessKeyMetadata": self.users_by_name[params["UserName"]]["access_keys"]},
+            "ListAttachedUserPolicies": lambda params, region: {"AttachedPolicies": [{"PolicyName": name, "PolicyArn": f"arn:aws:iam::aws:policy/{name}"} for name in self.users_by_name[params["UserName"]]["policies"]]},
+            "ListGroupsForUser": lambda params, region: {"Groups": [{"GroupName": name, "Path": "/", "GroupId": "G" * 16, "Arn": "arn:aws:iam::000000000000:group/x", "CreateDate": now} for name in self.users_by_name[params["UserName"]]["groups"]]},
+            "ListSigningCertificates": lambda params, region: {"Certificates": [{"UserName": params["UserName"], "CertificateId": "C" * 24, "CertificateBody": "x", "Status": "Active"}] if self.users_by_name[params["UserName"]]["certificate"] else []},
+            "GetLoginProfile": lambda params, region: {"LoginProfile": {"UserName": params["UserName"], "CreateDate": now}} if self.users_by_name[params["UserName"]]["password"] else _client_error("NoSuchEntity", "GetLoginProfile"),
+            "ListMFADevices": lambda params, region: {"MFADevices": [{"UserName": params["UserName"], "SerialNumber": "arn:aws:iam::000000000000:mfa/x", "EnableDate": now}] if self.users_by_name[params["UserName"]]["mfa"] else []},
+            "GenerateCredentialReport": lambda params, region: {"State": "COMPLETE"},
+            "GetCredentialReport": lambda params, region: {"Content": self._credential_report(), "ReportFormat": "text/csv", "GeneratedTime": now},
+            "GetAccountAuthorizationDetails": lambda params, region: _page(self.user_details, params, "UserDetailList", "Marker", "Marker", IAM_PAGE_SIZE, truncated_flag=True),
+        }
+
+    def _describe_instances(self, params, region):
+        page = _page(self.instances.get(region, []), params, "Instances", "NextToken", "NextToken", EC2_PAGE_SIZE)
+        page["Reservations"] = [{"Instances": page.pop("Instances")}]
+        return page
+
+    def _describe_security_groups(self, params, region):
+        groups = self.security_groups.get(region, [])
+        if params.get("GroupIds"):
+            return {"SecurityGroups": [group for group in groups if group["GroupId"] in params["GroupIds"]]}
+        return _page(groups, params, "SecurityGroups", "NextToken", "NextToken", EC2_PAGE_SIZE)
+
+    def _get_bucket_acl(self, params, region):
+        grants = [{"Grantee": {"Type": "Group", "URI": "http://acs.amazonaws.com/groups/global/AllUsers"}, "Permission": "READ"}]
+        return {"Grants": grants if self.buckets[params["Bucket"]]["public_acl"] else []}
+
+    def _get_public_access_block(self, params, region):
+        blocked = self.buckets[params["Bucket"]]["public_access_block"]
+        if blocked is None:
+            return _client_error("NoSuchPublicAccessBlockConfiguration", "GetPublicAccessBlock")
+        settings = ["BlockPublicAcls", "IgnorePublicAcls", "BlockPublicPolicy", "RestrictPublicBuckets"]
+        return {"PublicAccessBlockConfiguration": {setting: blocked for setting in settings}}
+
+    def _get_bucket_policy(self, params, region):
+        policy = self.buckets[params["Bucket"]]["policy"]
+        if policy is None:
+            return _client_error("NoSuchBucketPolicy", "GetBucketPolicy")
+        return {"Policy": policy}
+
+    def _credential_report(self):
+        fields = [
+            "user", "password_enabled", "mfa_active",
+            "access_key_1_active", "access_key_1_last_rotated", "access_key_2_active", "access_key_2_last_rotated",
+            "cert_1_last_rotated", "cert_2_last_rotated",
+        ]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        writer.writerow({field: "N/A" for field in fields} | {"user": "<root_account>"})
+        for user in self.users:
+            row = {
+                "user": user["UserName"],
+                "password_enabled": str(user["password"]).lower(),
+                "mfa_active": str(user["mfa"]).lower(),
+                "cert_1_last_rotated": user["CreateDate"].isoformat() if user["certificate"] else "N/A",
+                "cert_2_last_rotated": "N/A",
+            }
+            for n in (1, 2):
+                key = user["access_keys"][n - 1] if len(user["access_keys"]) >= n else None
+                row[f"access_key_{n}_active"] = str(bool(key) and key["Status"] == "Active").lower()
+                row[f"access_key_{n}_last_rotated"] = key["CreateDate"].isoformat() if key else "N/A"
+            writer.writerow(row)
+        return buffer.getvalue().encode("utf-8")
+
+    def respond(self, operation, params, region):
+        handler = self.handlers.get(operation)
+        if handler is None:
+            return {}
+        return handler(params, region)
+
+
+def fleet_session(fleet):
+    """A boto3 session whose API calls are answered by the fleet instead of AWS.
+
+    Returns (session, calls) where calls counts the requests per (service, operation).
+    """
+    session = boto3.Session(aws_access_key_id="bench", aws_secret_access_key="bench", region_name="us-east-1")
+    calls = Counter()
+    calls_lock = threading.Lock()
+
+    def capture_params(params, context, **kwargs):
+        context["bench_params"] = dict(params)
+
+    def respond(model, context, **kwargs):
+        with calls_lock:
+            calls[(model.service_model.endpoint_prefix, model.name)] += 1
+        parsed = fleet.respond(model.name, context.get("bench_params", {}), context.get("client_region"))
+        if isinstance(parsed, Exception):
+            raise parsed
+        parsed.setdefault("ResponseMetadata", {"HTTPStatusCode": 200, "RetryAttempts": 0})
+        return _Response(), parsed
+
+    session.events.register("before-parameter-build", capture_params)
+    session.events.register("before-call", respond)
+    return session, calls
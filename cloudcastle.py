@@ -3,9 +3,12 @@ import os
 import json
 import typer
 import subprocess
-import auth
-from datetime import datetime, timezone
-from logger import save_log
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List
+from logger import save_log, export_account_log, new_run_id, capture_output, emit, collect_scan_failures, scan_failed
+from aws_scanner.metrics import get_api_metrics, print_api_metrics_summary, write_api_metrics
+from aws_scanner.ratelimit import print_rate_limit_summary, reset_rate_limit_stats, scan_throttles, throttle_count
 
 sys.stdout.reconfigure(encoding="utf-8")
 
@@ -71,10 +74,10 @@ def auth_aws():
         except subprocess.CalledProcessError:
             typer.echo("❌ AWS authentication failed. Please try again.")
 
-@app.command()
-def scan_aws(account_id: str, account_name: str, session):
-    """Scans all AWS Cloud Infra for a specific account."""
+SERVICE_WORKERS = 4  # max service scanners running at the same time per account
 
+def build_scan_map(full=False, services=None):
+    """Scan type -> scanner(session, account_id), in scan order; only the given services when set."""
     from aws_scanner.iam import check_iam_users
     from aws_scanner.ec2 import check_ec2
     from aws_scanner.vpc import scan_vpc
@@ -84,9 +87,8 @@ def scan_aws(account_id: str, account_name: str, session):
     from aws_scanner.s3 import scan_s3
     from aws_scanner.rds import scan_rds
 
-
     scan_map = { 
-        "iam": check_iam_users,
+        "iam": partial(check_iam_users, full_scan=full),
         "ec2": check_ec2,
         "vpc": scan_vpc,
         "gateways": scan_gateways,
@@ -95,26 +97,186 @@ def scan_aws(account_id: str, account_name: str, session):
         "s3": scan_s3,
         "rds": scan_rds
     }
+    if services:
+        scan_map = {scan_type: scanner for scan_type, scanner in scan_map.items() if scan_type in services}
+    return scan_map
+
+@app.command()
+def scan_aws(account_id: str, account_name: str, session, concurrent: bool = False, max_workers: int = SERVICE_WORKERS, run_id: str = None, full: bool = False, services: List[str] = None):
+    """Scans all AWS Cloud Infra (or only the given services) for a specific account.
+
+    IAM (per-user mode) reuses the previous finding of users whose fingerprint did not change;
+    --full rescans everything. Returns the scan types that failed: the scanner raised, its
+    results could not be saved, or it failed beyond single regions or resources (scanners
+    count an error they cannot recover from, such as a denied listing call, as one failed
+    resource of the whole scan). Failed regions and resources alone only leave those out of
+    run comparisons.
+    """
+
+    from aws_scanner.inventory import reset_inventory
+
+    scan_map = build_scan_map(full, services)
+    failed_scans = []
+
+    run_id = run_id or new_run_id()
+    get_api_metrics(account_id).reset()
+    reset_rate_limit_stats(account_id)
+    reset_inventory(account_id)  # EC2, VPC and gateway scans share one fetch of each EC2 resource type
+
+    try:
+        if not concurrent:
+            for scan_type, scan_function in scan_map.items():
+                outcome, failed_scopes = run_service_scan(scan_type, scan_function, session, account_id)
+                if not outcome or not save_service_scan(scan_type, outcome, account_id, account_name, run_id, failed_scopes) or scan_failed(outcome[3], failed_scopes):
+                    failed_scans.append(scan_type)
+            export_scan_log(account_id)
+            report_api_metrics(account_id)
+            return failed_scans
 
-    for scan_type, scan_function in scan_map.items():
+        # Scanners run side by side; their output is buffered and printed (and saved) in scan_map order.
+        from auth.auth_aws import SharedSession
+        if not isinstance(session, SharedSession):
+            session = SharedSession(session)
+
+        def run_buffered(scan_type, scan_function):
+            with capture_output() as output:
+                scanned = run_service_scan(scan_type, scan_function, session, account_id)
+            return output.getvalue(), scanned
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                scan_type: executor.submit(run_buffered, scan_type, scan_function)
+                for scan_type, scan_function in scan_map.items()
+            }
+            for scan_type, future in futures.items():
+                output, (outcome, failed_scopes) = future.result()
+                emit(output)
+                if not outcome or not save_service_scan(scan_type, outcome, account_id, account_name, run_id, failed_scopes) or scan_failed(outcome[3], failed_scopes):
+                    failed_scans.append(scan_type)
+        export_scan_log(account_id)
+        report_api_metrics(account_id)
+        return failed_scans
+    finally:
+        reset_inventory(account_id)  # free the account's EC2 resources before the next account is scanned
+
+def run_service_scan(scan_type, scan_function, session, account_id):
+    """Run one service scanner and print its summary.
+
+    Returns (the scanner's result tuple or None on failure, the failed scopes it recorded).
+    """
+    with collect_scan_failures() as failed_scopes:
         try:
             typer.echo(f"- Running {scan_type.upper()} Security Scan...")
-            results, avg_risk, scanned_count, failed_count, mitre_recommendations = scan_function(session, account_id)
+            with scan_throttles(scan_type):
+                results, avg_risk, scanned_count, failed_count, mitre_recommendations = scan_function(session, account_id)
             typer.echo(f"\n📊 **Average {scan_type.upper()} Risk Score: {avg_risk}/100**")
             typer.echo(f"- Scanned {scanned_count} out of {scanned_count + failed_count} {scan_type} resources.")
-            save_log(
-                account_name=account_name,
-                account_id=account_id,
-                scan_type=scan_type,
-                results=results,
-                avg_risk=avg_risk,
-                scanned_count=scanned_count,
-                failed_count=failed_count,
-                mitre_recommendations=mitre_recommendations,
-                provider="aws",
-            )
+            throttles = throttle_count(account_id, scan_type)
+            if throttles:
+                typer.echo(f"- 🚦 {throttles} throttled API calls were retried during this scan.")
+            if failed_count and not scan_failed(failed_count, failed_scopes):
+                typer.echo(f"- ⚠️ Left out of run comparisons: {', '.join(sorted(set(failed_scopes)))}")
+            return (results, avg_risk, scanned_count, failed_count, mitre_recommendations), failed_scopes
         except Exception as e:
             typer.echo(f"❌ {scan_type.upper()} scan failed: {e}")
+            return None, failed_scopes
+
+def export_scan_log(account_id):
+    try:
+        log_file_path = export_account_log(account_id, provider="aws")
+        typer.echo(f"📝 Scan log for account {account_id} exported to {log_file_path}")
+    except Exception as e:
+        typer.echo(f"❌ Could not export scan log for account {account_id}: {e}")
+
+def report_api_metrics(account_id):
+    print_api_metrics_summary(account_id)
+    print_rate_limit_summary(account_id)
+    try:
+        metrics_path = write_api_metrics(account_id)
+        if metrics_path:
+            typer.echo(f"📝 API call metrics for account {account_id} written to {metrics_path}")
+    except Exception as e:
+        typer.echo(f"❌ Could not write API call metrics for account {account_id}: {e}")
+
+def save_service_scan(scan_type, outcome, account_id, account_name, run_id=None, failed_scopes=None):
+    results, avg_risk, scanned_count, failed_count, mitre_recommendations = outcome
+    try:
+        save_log(
+            account_name=account_name,
+            account_id=account_id,
+            scan_type=scan_type,
+            results=results,
+            avg_risk=avg_risk,
+            scanned_count=scanned_count,
+            failed_count=failed_count,
+            mitre_recommendations=mitre_recommendations,
+            provider="aws",
+            run_id=run_id,
+            failed_scopes=failed_scopes,
+        )
+        return True
+    except Exception as e:
+        typer.echo(f"❌ Could not save {scan_type.upper()} scan results for account {account_id}: {e}")
+        return False
+
+
+@app.command()
+def scan(plan: str = typer.Argument(..., help="JSON scan plan: accounts, services, regions, concurrency, output, full.")):
+    """Scan the accounts of a plan file without prompts (for cron and CI); see USAGE.MD for the plan format.
+
+    Exit codes: 0 everything scanned, 1 some accounts or services failed, 2 invalid plan,
+    3 no account could be scanned.
+    """
+    from scan_plan import EXIT_INVALID_PLAN, load_scan_plan, run_scan_plan
+
+    try:
+        scan_plan = load_scan_plan(plan, list(build_scan_map()))
+    except ValueError as e:
+        typer.echo(f"❌ Invalid scan plan: {e}")
+        raise typer.Exit(code=EXIT_INVALID_PLAN)
+    raise typer.Exit(code=run_scan_plan(scan_plan))
+
+@app.command()
+def runs():
+    """List the stored scan runs."""
+    from logger import list_runs
+
+    stored_runs = list_runs(provider="aws")
+    if not stored_runs:
+        typer.echo("⚠️ No scan runs stored yet.")
+        return
+    for run_id, started_at, account_count, finding_count in stored_runs:
+        typer.echo(f"🗂️ {run_id}  (started {started_at}, {account_count} accounts, {finding_count} findings)")
+
+@app.command()
+def diff(old_run: str = None, new_run: str = None, account_id: str = None):
+    """Show new, resolved and changed findings between two scan runs (default: the last two)."""
+    from history import diff_runs, latest_runs, print_diff
+
+    if not old_run or not new_run:
+        recent = latest_runs(provider="aws", count=None)
+        if not new_run and recent:
+            new_run = recent[-1]
+        if not old_run and new_run:
+            old_run = next((run for run in reversed(recent) if run < new_run), None)
+        if not old_run or not new_run:
+            typer.echo("⚠️ At least two scan runs are needed for a diff.")
+            raise typer.Exit(code=1)
+
+    print_diff(diff_runs(old_run, new_run, provider="aws", account_id=account_id), old_run, new_run)
+
+
+@app.command()
+def report(mode: str = "auto", account: List[str] = typer.Option(None), service: List[str] = typer.Option(None)):
+    """Generate the HTML report (mode: auto, full or compact), optionally for some accounts and services."""
+    from export import export_to_html
+    export_to_html(mode, accounts=account or None, services=service or None)
+
+@app.command()
+def export(fmt: str = typer.Option("jsonl", "--format"), account: List[str] = typer.Option(None), service: List[str] = typer.Option(None)):
+    """Export every finding as JSONL, CSV, SARIF or a Parquet dataset, optionally for some accounts and services."""
+    from export import export_findings
+    export_findings(fmt, accounts=account or None, services=service or None)
 
 
 # Leave this here for now
@@ -1,5 +1,10 @@
+import csv
+import functools
+import heapq
 import json
 import os
+import sys
+import time
 import jinja2
 from datetime import datetime
 from threatintel import mitre
@@ -104,6 +109,14 @@ TEMPLATE_HTML = """<!DOCTYPE html>
         td.risk_class:contains('High') { color: red; }
         td.risk_class:contains('Medium') { color: orange; }
         td.risk_class:contains('Low') { color: green; }
+
+        .virtual-table .vt-filter { background: #2b2b3b; color: #fff; padding: 6px 10px; border: 1px solid #555; border-radius: 5px; margin-top: 10px; }
+        .virtual-table .vt-viewport { max-height: 520px; overflow-y: auto; margin-top: 10px; }
+        .virtual-table table { margin-top: 0; }
+        .virtual-table thead th { position: sticky; top: 0; }
+        .virtual-table tbody tr { height: 35px; }
+        .virtual-table td { white-space: nowrap; overflow: hidden; text-overflow: ellipsis; max-width: 320px; }
+        .virtual-table td.vt-spacer { padding: 0; border: none; }
     </style>
     <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
 </head>
@@ -115,7 +128,7 @@ TEMPLATE_HTML = """<!DOCTYPE html>
         <div style="text-align:center; margin-top: 10px;">
         <label for="account-select" style="font-weight:bold;">Select Account:</label>
         <select id="account-select" onchange="switchAccount(this.value)">
-            {% for account in account_sections %}
+            {% for account in account_index %}
                 <option value="{{ account.account_id }}" {% if loop.first %}selected{% endif %}>
                     {{ account.account_name }} ({{ account.account_id }})
                 </option>
@@ -224,7 +237,9 @@ TEMPLATE_HTML = """<!DOCTYPE html>
             </div>
         {% endif %}
 
-        {% if results %}
+        {% if results and compact %}
+            <div class="virtual-table" data-account="{{ account.account_id }}" data-scan="{{ scan_key }}"></div>
+        {% elif results %}
             <table data-enhance="true" id="{{ account.account_id }}-{{ scan_key }}-table">
                 <thead>
                     <tr>
@@ -240,7 +255,7 @@ TEMPLATE_HTML = """<!DOCTYPE html>
                             {% if key == 'risk_score' %}
                                 <td class="risk_score">{{ value }}</td>
                             {% elif key == 'risk_class' %}
-                                <td class="risk_class">{{ value }}</td>
+                                <td class="risk_class">{{ risk_class_labels.get(value, value) }}</td>
                             {% else %}
                                 <td>{{ value }}</td>
                             {% endif %}
@@ -255,6 +270,9 @@ TEMPLATE_HTML = """<!DOCTYPE html>
     </div>
     {% endfor %}
 </div>
+{% if compact %}
+<script type="application/json" id="findings-{{ account.account_id }}">{{ account.compact_results | tojson }}</script>
+{% endif %}
 {% endfor %}
 
 <!-- JS & DataTables -->
@@ -278,7 +296,7 @@ TEMPLATE_HTML = """<!DOCTYPE html>
         switchAccount(accountId);
 
         setTimeout(() => {
-            const el = document.querySelector(linkTarget);
+            const el = document.getElementById(linkTarget);
             if (el) {
                 el.scrollIntoView({ behavior: "smooth", block: "start" });
                 el.classList.add("highlight-risk");
@@ -289,12 +307,23 @@ TEMPLATE_HTML = """<!DOCTYPE html>
         }, 500); // ⏳ Give 500ms to allow DOM to update
     }
 
+    const RISK_CLASS_LABELS = {{ risk_class_labels | tojson }};
+    const VT_ROW_HEIGHT = 35;   // px, must match .virtual-table tbody tr
+    const VT_OVERSCAN = 10;     // rows rendered above and below the visible window
+    const findingsCache = {};
+
     function switchAccount(accountId) {
         document.querySelectorAll('.account-section').forEach(el => el.style.display = 'none');
-        document.getElementById('account-' + accountId).style.display = 'block';
+        const section = document.getElementById('account-' + accountId);
+        if (!section) return;
+        section.style.display = 'block';
+        enhanceTables(section, accountId);
     }
-    document.addEventListener("DOMContentLoaded", function() {
-        document.querySelectorAll("table[data-enhance='true']").forEach(function(table) {
+
+    // Tables are only built for the account on screen
+    function enhanceTables(section, accountId) {
+        section.querySelectorAll("table[data-enhance='true']").forEach(function(table) {
+            table.removeAttribute("data-enhance");
             new DataTable(table, {
                 pageLength: 10,
                 lengthChange: false,
@@ -303,24 +332,100 @@ TEMPLATE_HTML = """<!DOCTYPE html>
             });
         });
 
-        document.querySelectorAll('td.risk_class').forEach(td => {
-            const txt = td.textContent.toLowerCase();
-            if (txt.includes("high")) td.textContent = "🔴 High";
-            else if (txt.includes("medium")) td.textContent = "🟡 Medium";
-            else if (txt.includes("low")) td.textContent = "🟢 Low";
+        const pending = section.querySelectorAll(".virtual-table:not([data-mounted])");
+        if (!pending.length) return;
+        const observer = new IntersectionObserver(entries => {
+            entries.filter(entry => entry.isIntersecting).forEach(entry => {
+                observer.unobserve(entry.target);
+                mountVirtualTable(entry.target, accountFindings(accountId)[entry.target.dataset.scan]);
+            });
+        }, { rootMargin: "200px" });
+        pending.forEach(el => observer.observe(el));
+    }
+
+    function accountFindings(accountId) {
+        if (!findingsCache[accountId]) {
+            findingsCache[accountId] = JSON.parse(document.getElementById('findings-' + accountId).textContent);
+        }
+        return findingsCache[accountId];
+    }
+
+    // Renders only the rows in view; data is { columns: [...], values: [[column 0 values], ...] }
+    function mountVirtualTable(container, data) {
+        container.setAttribute("data-mounted", "true");
+        const columns = data.columns;
+        const values = data.values;
+        const rowCount = values.length ? values[0].length : 0;
+        let order = Array.from({ length: rowCount }, (_, i) => i);
+
+        const filter = document.createElement("input");
+        filter.className = "vt-filter";
+        filter.placeholder = `Search ${rowCount} findings...`;
+        const viewport = document.createElement("div");
+        viewport.className = "vt-viewport";
+        const table = document.createElement("table");
+        const headRow = table.createTHead().insertRow();
+        columns.forEach(col => {
+            const th = document.createElement("th");
+            th.textContent = col.replace(/_/g, " ").replace(/\\b\\w/g, c => c.toUpperCase());
+            headRow.appendChild(th);
         });
+        const tbody = table.createTBody();
+        viewport.appendChild(table);
+        container.append(filter, viewport);
 
-        let high = 0, medium = 0, low = 0;
+        function spacer(height) {
+            const tr = document.createElement("tr");
+            tr.style.height = height + "px";
+            const td = tr.insertCell();
+            td.className = "vt-spacer";
+            td.colSpan = columns.length;
+            return tr;
+        }
+
+        function render() {
+            const start = Math.max(0, Math.floor(viewport.scrollTop / VT_ROW_HEIGHT) - VT_OVERSCAN);
+            const end = Math.min(order.length, start + Math.ceil(viewport.clientHeight / VT_ROW_HEIGHT) + 2 * VT_OVERSCAN);
+            const rows = [spacer(start * VT_ROW_HEIGHT)];
+            for (let i = start; i < end; i++) {
+                const tr = document.createElement("tr");
+                columns.forEach((col, c) => {
+                    const td = tr.insertCell();
+                    const value = values[c][order[i]];
+                    if (col === "risk_score") td.className = "risk_score";
+                    if (col === "risk_class") {
+                        td.className = "risk_class";
+                        td.textContent = RISK_CLASS_LABELS[value] || value;
+                    } else {
+                        td.textContent = value === null || value === undefined ? "" : typeof value === "object" ? JSON.stringify(value) : value;
+                    }
+                    td.title = td.textContent;
+                });
+                rows.push(tr);
+            }
+            rows.push(spacer((order.length - end) * VT_ROW_HEIGHT));
+            tbody.replaceChildren(...rows);
+        }
 
-        document.querySelectorAll('.account-section').forEach(section => {
-            const riskText = section.querySelector("span.total-risk")?.textContent || "";
-            const match = riskText.match(/(\\d+)/); // extract numeric part
-            if (!match) return;
-            const score = parseInt(match[1]);
-            if (score > 60) high++;
-            else if (score > 30) medium++;
-            else low++;
+        filter.addEventListener("input", () => {
+            const query = filter.value.trim().toLowerCase();
+            order = [];
+            for (let r = 0; r < rowCount; r++) {
+                if (!query || values.some(column => String(column[r]).toLowerCase().includes(query))) order.push(r);
+            }
+            viewport.scrollTop = 0;
+            render();
         });
+        viewport.addEventListener("scroll", () => requestAnimationFrame(render));
+        render();
+    }
+
+    document.addEventListener("DOMContentLoaded", function() {
+        const accountSelect = document.getElementById("account-select");
+        if (accountSelect.value) switchAccount(accountSelect.value);
+
+        const aggregates = {{ aggregates.as_dict() | tojson }};
+        const { high, medium, low } = aggregates.risk_distribution;
 
         const awsRiskData = {
             labels: ["High", "Medium", "Low"],
@@ -349,16 +454,7 @@ TEMPLATE_HTML = """<!DOCTYPE html>
 
         new Chart(document.getElementById("aws-risk-chart"), awsConfig);
 
-        let resourceTotals = {};
-
-        document.querySelectorAll("table[id$='-table']").forEach(table => {
-            const scanKey = table.id.split("-").slice(1, -1).join("-");
-
-            let caseCount = table.querySelectorAll("td.risk_score").length;
-            if (caseCount > 0) {
-                resourceTotals[scanKey] = (resourceTotals[scanKey] || 0) + caseCount;
-            }
-        });
+        const resourceTotals = aggregates.resource_totals;
 
         function generateColor(index) {
             const hue = (index * 47) % 360; // Spread hues around the wheel
@@ -394,55 +490,7 @@ TEMPLATE_HTML = """<!DOCTYPE html>
             new Chart(document.getElementById("resource-risk-chart"), resourceConfig);
         }
 
-        let topFindings = [];
-
-        document.querySelectorAll("table[id$='-table']").forEach(table => {
-            const tableIdParts = table.id.split("-");
-            const accountId = tableIdParts[0];
-            const scanKey = tableIdParts.slice(1, -1).join("-").toUpperCase();
-
-            const accountSection = document.getElementById(`account-${accountId}`);
-            const accountNameElement = accountSection?.querySelector("h2");
-            const accountName = accountNameElement ? accountNameElement.textContent.replace("🧾 Report For Account: ", "").trim() : "Unknown Account";
-
-            const linkTarget = `#account-${accountId}-${scanKey.toLowerCase()}-section`;
-
-            table.querySelectorAll("tbody tr").forEach(row => {
-                const cells = row.querySelectorAll("td");
-                if (!cells.length) return;
-
-                let riskScore = 0;
-                let name = "";
-
-                cells.forEach((cell, idx) => {
-                    const headerEl = table.querySelectorAll("thead th")[idx];
-                    if (!headerEl) return;
-
-                    const header = headerEl.innerText.toLowerCase();
-                    if (header.includes("risk score")) {
-                        riskScore = parseInt(cell.innerText.trim());
-                    }
-                    if (!name && (header.includes("name") || header.includes("instance") || header.includes("bucket") || header.includes("username"))) {
-                        name = cell.innerText.trim();
-                    }
-                });
-
-                if (riskScore > 0 && name) {
-                    topFindings.push({
-                        accountId: accountId,
-                        section: scanKey,
-                        name: name,
-                        score: riskScore,
-                        link: linkTarget,
-                        accountName: accountName
-                    });
-                }
-            });
-        });
-
-        topFindings.sort((a, b) => b.score - a.score);
-
-        const top10 = topFindings.slice(0, 10);
+        const top10 = aggregates.top_risks;
 
         // Inject into Top 10 Table
         const topRisksTableBody = document.querySelector("#top-risks-table tbody");
@@ -480,98 +528,356 @@ TEMPLATE_HTML = """<!DOCTYPE html>
 import json
 import os
 from jinja2 import Environment, FileSystemLoader
+from logger import LOGS_DIR, iter_finding_keys, list_logged_account_summaries, load_account_log
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+TOP_RISKS_COUNT = 10
+REPORT_MODES = ("auto", "full", "compact")
+COMPACT_REPORT_THRESHOLD = 20000  # findings above which "auto" switches to the compact report
+FINDING_NAME_HINTS = ("name", "instance", "bucket", "username")  # columns that identify a finding
+RISK_CLASS_LABELS = {"risk-high": "🔴 High", "risk-medium": "🟡 Medium", "risk-low": "🟢 Low"}
+SCAN_KEYS = ["iam", "ec2", "vpc", "gateways", "route53", "cloudtrail", "s3", "rds"]
+LOG_READ_CHUNK = 1 << 20  # read size when parsing a legacy logs.json incrementally
+JSON_DELIMITERS = set(" \t\r\n,:]}")  # characters that can follow a complete JSON value
+FINDING_FORMATS = ("jsonl", "csv", "sarif", "parquet")
+FINDING_COLUMNS = [
+    "provider", "account_id", "account_name", "service", "resource_key", "resource_name",
+    "region", "risk_score", "risk_class", "details"
+]
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+def list_report_accounts(provider="aws", accounts=None):
+    """Index of the accounts to report on, without their findings.
+
+    Returns {account_id: {"account_name", "finding_count", "log_path"}}, optionally
+    restricted to the account ids in accounts. Accounts come from the results store first
+    (log_path None); logs.json files only for accounts it does not know (older scans).
+    Those are streamed here for their name and counts only, and decoded again when the
+    account's section is rendered, so no account's results are held before then.
+    """
+    base_path = os.path.join(LOGS_DIR, provider)
+    account_index = {}
+
+    for account_id, account_name, finding_count in list_logged_account_summaries(provider):
+        if accounts and account_id not in accounts:
+            continue
+        account_index[account_id] = {
+            "account_name": account_name or account_id,
+            "finding_count": finding_count or 0,
+            "log_path": None
+        }
 
-def build_account_sections(provider="aws"):
-    
-    base_path = os.path.join("logs", provider)
-    account_sections = {}
-
-    if not os.path.exists(base_path):
+    if not account_index and not os.path.exists(base_path):
         print(f"❌ No logs found in {base_path}")
         return {}
 
-    for account_id in os.listdir(base_path):
+    for account_id in sorted(os.listdir(base_path)) if os.path.exists(base_path) else []:
+        if account_id in account_index or (accounts and account_id not in accounts):
+            continue
         account_log_path = os.path.join(base_path, account_id, "logs.json")
         if os.path.exists(account_log_path):
             try:
-                with open(account_log_path, "r", encoding="utf-8") as f:
-                    log_data = json.load(f)
-                    account_name = log_data.get("account_name", account_id)
-
-                    account_sections[account_id] = {
-                        "account_name": account_name,
-                        "scan_data": log_data
-                    }
+                account_name = None
+                finding_count = 0
+                for key, value in iter_log_sections(account_log_path):
+                    if key == "account_name":
+                        account_name = value
+                    elif isinstance(value, dict):
+                        finding_count += value.get("scanned_count", 0) + value.get("failed_count", 0)
+                account_index[account_id] = {
+                    "account_name": account_name or account_id,
+                    "finding_count": finding_count,
+                    "log_path": account_log_path
+                }
             except Exception as e:
                 print(f"❌ Error loading logs for {account_id}: {e}")
-    return account_sections
+    return account_index
+
+def build_account_sections(provider="aws", accounts=None, services=None, account_index=None):
+    """Lazily yield the report section of one account at a time.
+
+    accounts and services restrict which account ids and scan types are loaded; pass an
+    account_index from list_report_accounts to reuse one that was already built. Accounts
+    that cannot be loaded or are malformed are reported and skipped.
+    """
+    if account_index is None:
+        account_index = list_report_accounts(provider, accounts)
+    scan_keys = [key for key in SCAN_KEYS if not services or key in services]
+
+    for account_id, account in account_index.items():
+        try:
+            scan_data = load_scan_data(account_id, account, provider, scan_keys)
+        except Exception as e:
+            print(f"❌ Error loading logs for {account_id}: {e}")
+            continue
+
+        section = prepare_account_section(account_id, account["account_name"], scan_data, scan_keys)
+        if section is not None:
+            yield section
+
+def load_scan_data(account_id, account, provider="aws", services=None):
+    """Load one indexed account's results in the logs.json layout (only services, when given)."""
+    if account["log_path"] is None:
+        return load_account_log(account_id, provider, services)
+    return {
+        key: value for key, value in iter_log_sections(account["log_path"])
+        if key == "account_name" or services is None or key in services
+    }
 
-def export_to_html():
-    
-    accounts_data = build_account_sections()
-    account_sections = []
-    all_account_ids = []
+def iter_log_sections(path):
+    """Top-level (key, value) pairs of a logs.json file, decoded one at a time.
 
+    Uses ijson when it is installed. Otherwise the file is read in growing chunks and each
+    value is decoded with json.JSONDecoder.raw_decode as soon as it is complete.
+    """
     try:
-        for account_id, scans in accounts_data.items():
-            
-            account_name = scans.get("account_name", account_id)
-            scan_data = scans.get("scan_data", {})
-            scan_results = {}
-            avg_risks = {}
-            scanned_counts = {}
-            failed_counts = {}
-            mitre_notes = {}
-            total_avg_scores = []
-
-            for scan_key in ["iam", "ec2", "vpc", "gateways", "route53", "cloudtrail", "s3", "rds"]:
-                scan_section = scan_data.get(scan_key, {})
-                scan_results[scan_key] = scan_section.get("results", [])
-                avg_risks[scan_key] = scan_section.get("avg_risk", 0)
-                scanned_counts[scan_key] = scan_section.get("scanned_count", 0)
-                failed_counts[scan_key] = scan_section.get("failed_count", 0)
-                mitre_notes[scan_key] = scan_section.get("mitre_recommendations", [])
-                if avg_risks[scan_key] > 0:
-                    total_avg_scores.append(avg_risks[scan_key])
-
-            total_avg_risk = round(sum(total_avg_scores) / len(total_avg_scores)) if total_avg_scores else 0
-
-            try:
-                for key, value in scan_results.items():
-                    if key == "gateways":
-                        if isinstance(scan_results[key], dict):
-                            combined = []
-                            for subtype in ["internet_gateways", "nat_gateways"]:
-                                combined.extend(scan_results[key].get(subtype, []))
-                            scan_results[key] = combined
-
-                    else:
-                        if not isinstance(value, list):
-                            print(f"⚠️ Scan '{key}' results was not a list. Defaulting to empty.")
-                            scan_results[key] = []
-                            avg_risks[key] = 0
-                            scanned_counts[key] = 0
-                            failed_counts[key] = 0
-                            mitre_notes[key] = []
-                        elif value and not isinstance(value[0], dict):
-                            raise ValueError(f"❌ Scan '{key}' first item is not a dict in account {account_id}: {type(value[0])}")
-            except Exception as validation_err:
-                print(f"[ERROR] Skipping account {account_id} due to malformed scan data: {validation_err}")
+        import ijson
+    except ImportError:
+        ijson = None
+
+    if ijson is not None:
+        with open(path, "rb") as f:
+            yield from ijson.kvitems(f, "", use_float=True)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_json_object_items(f)
+
+def iter_json_object_items(f, chunk_size=LOG_READ_CHUNK):
+    """Incrementally decode the (key, value) pairs of the JSON object in file f."""
+    decoder = json.JSONDecoder()
+    read_size = chunk_size
+    buffer = ""
+    pos = 0
+    eof = False
+    state = "open"
+    key = None
+
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+
+        if pos == len(buffer) or state in ("key", "value"):
+            complete = False
+            if pos < len(buffer):
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                    # A number cut by the end of the buffer still decodes ("-3e10" as "-3" from "-3e"),
+                    # so a value only counts as complete when a delimiter follows it
+                    complete = eof or (end < len(buffer) and buffer[end] in JSON_DELIMITERS)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+            if not complete:
+                if eof:
+                    raise ValueError("unexpected end of log file")
+                if pos < len(buffer):
+                    read_size *= 2  # a value spans several reads: grow them so it decodes in O(size) overall
+                data = f.read(read_size)
+                buffer, pos, eof = buffer[pos:] + data, 0, not data
                 continue
 
-            account_sections.append({
-                "account_name": account_name,
-                "account_id": account_id,
-                "scan_results": scan_results,
-                "avg_risks": avg_risks,
-                "scanned_counts": scanned_counts,
-                "failed_counts": failed_counts,
-                "mitre_notes": mitre_notes,
-                "total_avg_risk": total_avg_risk
-            })
-
-    except Exception as e:
-        print(f"❌Error in aws data: {e}")
+            pos = end
+            read_size = chunk_size
+            if state == "key":
+                if not isinstance(item, str):
+                    raise ValueError("log file keys must be strings")
+                key, state = item, "colon"
+            else:
+                yield key, item
+                state = "next"
+            continue
+
+        char = buffer[pos]
+        pos += 1
+        if state == "open" and char == "{":
+            state = "first"
+        elif state in ("first", "next") and char == "}":
+            return
+        elif state == "first" or (state == "next" and char == ","):
+            if state == "first":
+                pos -= 1
+            state = "key"
+        elif state == "colon" and char == ":":
+            state = "value"
+        else:
+            raise ValueError(f"unexpected {char!r} in log file")
+
+def prepare_account_section(account_id, account_name, scan_data, scan_keys=SCAN_KEYS):
+    """Template context of one account, or None if its scan data is malformed."""
+    scan_results = {}
+    avg_risks = {}
+    scanned_counts = {}
+    failed_counts = {}
+    mitre_notes = {}
+    total_avg_scores = []
+
+    for scan_key in scan_keys:
+        scan_section = scan_data.get(scan_key, {})
+        scan_results[scan_key] = scan_section.get("results", [])
+        avg_risks[scan_key] = scan_section.get("avg_risk", 0)
+        scanned_counts[scan_key] = scan_section.get("scanned_count", 0)
+        failed_counts[scan_key] = scan_section.get("failed_count", 0)
+        mitre_notes[scan_key] = scan_section.get("mitre_recommendations", [])
+        if avg_risks[scan_key] > 0:
+            total_avg_scores.append(avg_risks[scan_key])
+
+    total_avg_risk = round(sum(total_avg_scores) / len(total_avg_scores)) if total_avg_scores else 0
+
+    try:
+        for key, value in scan_results.items():
+            if key == "gateways":
+                if isinstance(scan_results[key], dict):
+                    combined = []
+                    for subtype in ["internet_gateways", "nat_gateways"]:
+                        combined.extend(scan_results[key].get(subtype, []))
+                    scan_results[key] = combined
+
+            else:
+                if not isinstance(value, list):
+                    print(f"⚠️ Scan '{key}' results was not a list. Defaulting to empty.")
+                    scan_results[key] = []
+                    avg_risks[key] = 0
+                    scanned_counts[key] = 0
+                    failed_counts[key] = 0
+                    mitre_notes[key] = []
+                elif value and not isinstance(value[0], dict):
+                    raise ValueError(f"❌ Scan '{key}' first item is not a dict in account {account_id}: {type(value[0])}")
+    except Exception as validation_err:
+        print(f"[ERROR] Skipping account {account_id} due to malformed scan data: {validation_err}")
+        return None
+
+    return {
+        "account_name": account_name,
+        "account_id": account_id,
+        "scan_results": scan_results,
+        "avg_risks": avg_risks,
+        "scanned_counts": scanned_counts,
+        "failed_counts": failed_counts,
+        "mitre_notes": mitre_notes,
+        "total_avg_risk": total_avg_risk
+    }
+
+def finding_name(finding):
+    """Display name of a finding: the first column that looks like an identifier."""
+    return next(
+        (str(value) for key, value in finding.items() if value and any(hint in key for hint in FINDING_NAME_HINTS)),
+        ""
+    )
+
+class ReportAggregates:
+    """Dashboard data of the report, accumulated one account at a time.
+
+    Tracks the account risk distribution, the number of findings per service and the
+    top_count highest-scored findings (kept in a bounded heap, ties in report order).
+    """
+
+    def __init__(self, top_count=TOP_RISKS_COUNT):
+        self.top_count = top_count
+        self.risk_distribution = {"high": 0, "medium": 0, "low": 0}
+        self.resource_totals = {}
+        self.finding_count = 0
+        self._top_heap = []
+        self._position = 0
+
+    def add(self, account):
+        total_risk = account["total_avg_risk"]
+        level = "high" if total_risk > 60 else "medium" if total_risk > 30 else "low"
+        self.risk_distribution[level] += 1
+
+        for scan_key, results in account["scan_results"].items():
+            self.finding_count += len(results)
+            scored = 0
+            for finding in results:
+                if "risk_score" not in finding:
+                    continue
+                scored += 1
+                score = finding["risk_score"]
+                name = finding_name(finding)
+                if not isinstance(score, (int, float)) or score <= 0 or not name:
+                    continue
+
+                self._position += 1
+                entry = (score, -self._position, {
+                    "accountId": account["account_id"],
+                    "accountName": account["account_name"],
+                    "section": scan_key.upper(),
+                    "name": name,
+                    "score": score,
+                    "link": f"{account['account_id']}-{scan_key}-section",
+                })
+                if len(self._top_heap) < self.top_count:
+                    heapq.heappush(self._top_heap, entry)
+                elif entry[:2] > self._top_heap[0][:2]:
+                    heapq.heapreplace(self._top_heap, entry)
+            if scored:
+                self.resource_totals[scan_key] = self.resource_totals.get(scan_key, 0) + scored
+
+    def as_dict(self):
+        return {
+            "risk_distribution": self.risk_distribution,
+            "resource_totals": self.resource_totals,
+            "top_risks": [entry[2] for entry in sorted(self._top_heap, key=lambda entry: entry[:2], reverse=True)],
+        }
+
+def compact_findings(results):
+    """Columnar form of a section's findings: {"columns": [...], "values": [[column values], ...]}."""
+    columns = []
+    for finding in results:
+        columns.extend(key for key in finding if key not in columns)
+    return {
+        "columns": columns,
+        "values": [[finding.get(column) for finding in results] for column in columns],
+    }
+
+@functools.lru_cache(maxsize=None)
+def get_report_template():
+    """The report template, compiled once per process."""
+    return jinja2.Environment().from_string(TEMPLATE_HTML)
+
+def iter_report_sections(account_index, aggregates, compact, provider="aws", services=None):
+    """Prepare and aggregate one account at a time while the template renders."""
+    for section in build_account_sections(provider, services=services, account_index=account_index):
+        if compact:
+            section["compact_results"] = {
+                scan_key: compact_findings(results) for scan_key, results in section["scan_results"].items() if results
+            }
+        aggregates.add(section)
+        yield section
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it cannot be measured."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+def export_to_html(mode="auto", accounts=None, services=None):
+    """Render the HTML report.
+
+    "full" writes every finding as a table row. "compact" embeds each account's findings
+    once as columnar JSON and renders virtual-scrolling tables on demand, which keeps very
+    large reports openable. "auto" picks compact above COMPACT_REPORT_THRESHOLD findings.
+
+    The report is streamed to disk one account at a time, and the dashboard aggregates
+    (rendered at the end of the document) are collected along the way. accounts and
+    services optionally restrict the report to some account ids and scan types.
+    """
+    if mode not in REPORT_MODES:
+        print(f"❌ Unknown report mode '{mode}', expected one of: {', '.join(REPORT_MODES)}")
+        return
+
+    started = time.perf_counter()
+    peak_before = peak_rss_mb()
+    account_index = list_report_accounts(accounts=accounts)
+    compact = mode == "compact" or (
+        mode == "auto" and sum(account["finding_count"] for account in account_index.values()) > COMPACT_REPORT_THRESHOLD
+    )
+
     if not os.path.exists(REPORTS_DIR):
         os.makedirs(REPORTS_DIR)
 
@@ -579,11 +885,170 @@ def export_to_html():
     report_filename = f"CloudCastle_Report_{timestamp}.html"
     report_path = os.path.join(REPORTS_DIR, report_filename)
 
-    # Jinja template engine
-    template = jinja2.Template(TEMPLATE_HTML)
-    html_output = template.render(account_sections=account_sections)
-
+    aggregates = ReportAggregates()
+    stream = get_report_template().stream(
+        account_index=[{"account_id": account_id, **account} for account_id, account in account_index.items()],
+        account_sections=iter_report_sections(account_index, aggregates, compact, services=services),
+        compact=compact,
+        aggregates=aggregates,
+        risk_class_labels=RISK_CLASS_LABELS,
+    )
+    stream.enable_buffering(size=64)
     with open(report_path, "w", encoding="utf-8") as f:
-        f.write(html_output)
+        stream.dump(f)
+
+    print(f"📄 Report generated: {report_path} ({aggregates.finding_count} findings, {'compact' if compact else 'full'} mode)")
+    # The peak RSS is process-wide: it only describes this export if the export raised it
+    peak = peak_rss_mb()
+    if peak is None:
+        memory = "peak RSS N/A"
+    elif peak > peak_before:
+        memory = f"peak RSS {peak:.0f} MB"
+    else:
+        memory = f"peak RSS below the {peak:.0f} MB reached earlier in this process"
+    print(f"⏱️ Rendered in {time.perf_counter() - started:.2f}s, {memory}")
+
+def iter_findings(provider="aws", accounts=None, services=None):
+    """Normalized findings of every account, one account loaded at a time.
+
+    Each finding is a flat dict with FINDING_COLUMNS; "details" holds the scanner's own
+    fields. resource_key is the same (unique) key the run history uses.
+    """
+    for section in build_account_sections(provider, accounts, services):
+        account_id = section["account_id"]
+        for service, results in section["scan_results"].items():
+            for resource_key, finding in iter_finding_keys(account_id, service, results):
+                yield {
+                    "provider": provider,
+                    "account_id": account_id,
+                    "account_name": section["account_name"],
+                    "service": service,
+                    "resource_key": resource_key,
+                    "resource_name": finding_name(finding),
+                    "region": finding.get("region"),
+                    "risk_score": finding.get("risk_score"),
+                    "risk_class": finding.get("risk_class"),
+                    "details": finding,
+                }
+
+def write_findings_jsonl(findings, path):
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for finding in findings:
+            f.write(json.dumps(finding, default=str) + "\n")
+            count += 1
+    return count
+
+def write_findings_csv(findings, path):
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FINDING_COLUMNS)
+        writer.writeheader()
+        for finding in findings:
+            writer.writerow({**finding, "details": json.dumps(finding["details"], default=str)})
+            count += 1
+    return count
+
+def sarif_level(risk_score):
+    if not isinstance(risk_score, (int, float)):
+        return "none"
+    return "error" if risk_score > 60 else "warning" if risk_score > 30 else "note"
+
+def write_findings_sarif(findings, path):
+    """SARIF 2.1.0 log with one rule per service; results are written as they are produced."""
+    driver = {
+        "name": "CloudCastle",
+        "informationUri": "https://github.com/securityjoes/CloudCastle",
+        "rules": [
+            {"id": f"cloudcastle/{service}", "name": f"{service.upper()} posture", "shortDescription": {"text": f"{service.upper()} security posture finding"}}
+            for service in SCAN_KEYS
+        ],
+    }
+    header = json.dumps({"$schema": SARIF_SCHEMA, "version": "2.1.0"})[:-1]
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'{header}, "runs": [{{"tool": {{"driver": {json.dumps(driver)}}}, "results": [')
+        for finding in findings:
+            result = {
+                "ruleId": f"cloudcastle/{finding['service']}",
+                "level": sarif_level(finding["risk_score"]),
+                "message": {"text": f"{finding['service'].upper()} {finding['resource_name'] or finding['resource_key']}: risk score {finding['risk_score']}/100"},
+                "locations": [{"logicalLocations": [{"fullyQualifiedName": finding["resource_key"], "kind": "resource"}]}],
+                "partialFingerprints": {"resourceKey": finding["resource_key"]},
+                "properties": {key: finding[key] for key in FINDING_COLUMNS if key != "resource_key"},
+            }
+            f.write(("," if count else "") + json.dumps(result, default=str))
+            count += 1
+        f.write("]}]}")
+    return count
+
+def write_findings_parquet(findings, path):
+    """Parquet dataset partitioned as account_id=<id>/service=<service>/ (needs pyarrow).
+
+    Findings arrive grouped by account and service, so each partition is written as soon
+    as the next one starts and only one partition is held in memory.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("provider", pa.string()), ("account_name", pa.string()), ("resource_key", pa.string()),
+        ("resource_name", pa.string()), ("region", pa.string()), ("risk_score", pa.float64()),
+        ("risk_class", pa.string()), ("details", pa.string()),
+    ])
+    count = 0
+    partition = None
+    rows = []
+
+    def flush():
+        if not rows:
+            return
+        account_id, service = partition
+        partition_dir = os.path.join(path, f"account_id={account_id}", f"service={service}")
+        os.makedirs(partition_dir, exist_ok=True)
+        pq.write_table(pa.Table.from_pylist(rows, schema=schema), os.path.join(partition_dir, "part-0.parquet"))
+        rows.clear()
+
+    for finding in findings:
+        if (finding["account_id"], finding["service"]) != partition:
+            flush()
+            partition = (finding["account_id"], finding["service"])
+        risk_score = finding["risk_score"]
+        rows.append({
+            **{key: finding[key] for key in schema.names if key not in ("risk_score", "details")},
+            "risk_score": float(risk_score) if isinstance(risk_score, (int, float)) else None,
+            "details": json.dumps(finding["details"], default=str),
+        })
+        count += 1
+    flush()
+    return count
+
+def export_findings(fmt="jsonl", provider="aws", accounts=None, services=None):
+    """Stream every finding (optionally of some accounts and services only) to a
+    machine-readable file (JSONL, CSV, SARIF) or a Parquet dataset."""
+    if fmt not in FINDING_FORMATS:
+        print(f"❌ Unknown export format '{fmt}', expected one of: {', '.join(FINDING_FORMATS)}")
+        return None
+
+    writer = {
+        "jsonl": write_findings_jsonl,
+        "csv": write_findings_csv,
+        "sarif": write_findings_sarif,
+        "parquet": write_findings_parquet,
+    }[fmt]
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("❌ Parquet export needs pyarrow: pip install pyarrow")
+            return None
+
+    if not os.path.exists(REPORTS_DIR):
+        os.makedirs(REPORTS_DIR)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    extension = "" if fmt == "parquet" else f".{fmt}"
+    export_path = os.path.join(REPORTS_DIR, f"CloudCastle_Findings_{timestamp}{extension}")
 
-    print(f"📄 Report generated: {report_path}")
\ No newline at end of file
+    count = writer(iter_findings(provider, accounts, services), export_path)
+    print(f"📄 Exported {count} findings to {export_path}")
+    return export_path
@@ -0,0 +1,94 @@
+import json
+from logger import iter_run_findings, list_runs, load_run_failures, load_run_scans
+
+def index_run(run_id, provider="aws", account_id=None, scans=None, failed_scopes=frozenset()):
+    """Hash index of a run snapshot: finding_key -> (account_id, scan_type, digest, finding_json).
+
+    When scans is given, only findings of those (account_id, scan_type) pairs are indexed;
+    findings under failed_scopes (finding key prefixes) are left out.
+    """
+    return {
+        key: (account, scan_type, digest, finding)
+        for key, account, scan_type, digest, finding in iter_run_findings(run_id, provider, account_id)
+        if (scans is None or (account, scan_type) in scans) and not in_failed_scope(key, failed_scopes)
+    }
+
+def in_failed_scope(key, failed_scopes):
+    """Whether a finding key (account/service[/region]/resource[#n]) is under one of the failed scopes."""
+    if not failed_scopes:
+        return False
+    parts = key.split("#")[0].split("/")
+    return any("/".join(parts[:length]) in failed_scopes for length in range(3, len(parts) + 1))
+
+def changed_fields(old_finding, new_finding):
+    """Fields whose value differs between two versions of a finding: {field: (old, new)}."""
+    return {
+        field: (old_finding.get(field), new_finding.get(field))
+        for field in old_finding.keys() | new_finding.keys()
+        if old_finding.get(field) != new_finding.get(field)
+    }
+
+def diff_runs(old_run, new_run, provider="aws", account_id=None):
+    """Compare two run snapshots in linear time using their finding-key indexes.
+
+    Only services scanned in both runs are compared, so a partial run (or a scan that
+    failed) does not report everything it missed as resolved; the other (account, service)
+    pairs are listed under "skipped". Regions and resources a scan failed on in either run
+    are left out of the comparison too and listed under "skipped_scopes".
+    """
+    old_scans = load_run_scans(old_run, provider, account_id)
+    new_scans = load_run_scans(new_run, provider, account_id)
+    compared = old_scans & new_scans
+    failed_scopes = {
+        scope for scope in load_run_failures(old_run, provider, account_id) | load_run_failures(new_run, provider, account_id)
+        if tuple(scope.split("/", 2)[:2]) in compared
+    }
+
+    old_index = index_run(old_run, provider, account_id, compared, failed_scopes)
+    new_index = index_run(new_run, provider, account_id, compared, failed_scopes)
+
+    new_findings = []
+    changed_findings = []
+    for key, (_, _, digest, finding) in new_index.items():
+        previous = old_index.get(key)
+        if previous is None:
+            new_findings.append((key, json.loads(finding)))
+        elif previous[2] != digest:
+            changed_findings.append((key, changed_fields(json.loads(previous[3]), json.loads(finding))))
+
+    resolved_findings = [
+        (key, json.loads(finding))
+        for key, (_, _, _, finding) in old_index.items()
+        if key not in new_index
+    ]
+
+    return {
+        "new": sorted(new_findings, key=lambda item: item[0]),
+        "resolved": sorted(resolved_findings, key=lambda item: item[0]),
+        "changed": sorted(changed_findings, key=lambda item: item[0]),
+        "skipped": sorted(old_scans ^ new_scans),
+        "skipped_scopes": sorted(failed_scopes),
+    }
+
+def latest_runs(provider="aws", count=2):
+    """Ids of the most recent runs (all of them when count is None), oldest first."""
+    run_ids = [run_id for run_id, _, _, _ in list_runs(provider)]
+    return run_ids if count is None else run_ids[-count:]
+
+def print_diff(diff, old_run, new_run):
+    print(f"\n🔎 Changes from run {old_run} to run {new_run}:")
+    print(f"   🆕 {len(diff['new'])} new   ✅ {len(diff['resolved'])} resolved   🔁 {len(diff['changed'])} changed")
+
+    for key, finding in diff["new"]:
+        print(f"🆕 {key} (Risk Score: {finding.get('risk_score', 'N/A')})")
+    for key, finding in diff["resolved"]:
+        print(f"✅ {key} (was Risk Score: {finding.get('risk_score', 'N/A')})")
+    for key, fields in diff["changed"]:
+        changes = ", ".join(f"{field}: {old} → {new}" for field, (old, new) in sorted(fields.items()))
+        print(f"🔁 {key}: {changes}")
+
+    if diff["skipped"]:
+        skipped = ", ".join(f"{account}/{scan_type}" for account, scan_type in diff["skipped"])
+        print(f"⚠️ Not compared (not scanned, or failed, in one of the runs): {skipped}")
+    if diff["skipped_scopes"]:
+        print(f"⚠️ Not compared (a region or resource failed in one of the runs): {', '.join(diff['skipped_scopes'])}")
@@ -1,38 +1,410 @@
+import io
 import os
+import sys
 import json
+import hashlib
+import sqlite3
+import threading
+import contextvars
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
 
-def save_log(scan_type, account_name, results, avg_risk, scanned_count=0, failed_count=0, provider: str = "aws", account_id: str = "default", mitre_recommendations=None):
-    """Save scan results to logs/<provider>/<account_id>/logs.json without overwriting other scans."""
+LOGS_DIR = "logs"
+RESULTS_DB = "results.db"
 
-    base_dir = os.path.join("logs", provider, account_id)
-    os.makedirs(base_dir, exist_ok=True)
+# Field that identifies the resource of a finding, per scan type (used to key run snapshots)
+FINDING_ID_FIELDS = {
+    "iam": "username",
+    "ec2": "instance_id",
+    "vpc": "vpc_id",
+    "gateways": "gateway_id",
+    "route53": "domain",
+    "cloudtrail": "trail_name",
+    "s3": "bucket_name",
+    "rds": "db_name",
+}
+
+# Finding fields that change with time alone (an access key's age in days); left out of the
+# snapshot digest so a diff between runs of different days does not flag every such finding.
+# A key crossing the age limit still changes the digest through its risk_score.
+VOLATILE_FINDING_FIELDS = {
+    "iam": {"old_key_warning"},
+}
+
+_schema_ready = set()
+
+# Failed scopes recorded by the scan running in this context (see collect_scan_failures)
+_scan_failures = contextvars.ContextVar("cloudcastle_scan_failures", default=None)
+
+def connect_results_db():
+    """Open the scan results store: SQLite in WAL mode, so concurrent scans can commit side by side."""
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    db_path = os.path.join(LOGS_DIR, RESULTS_DB)
+    conn = sqlite3.connect(db_path, timeout=30)
+    if db_path not in _schema_ready:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_results (
+                provider TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                account_name TEXT,
+                scan_type TEXT NOT NULL,
+                results TEXT NOT NULL,
+                avg_risk INTEGER,
+                scanned_count INTEGER,
+                failed_count INTEGER,
+                mitre_recommendations TEXT NOT NULL,
+                saved_at TEXT NOT NULL,
+                PRIMARY KEY (provider, account_id, scan_type)
+            )
+        """)
+        # Run history: every scan run keeps a snapshot of its findings
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_runs (
+                run_id TEXT PRIMARY KEY,
+                started_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_scans (
+                run_id TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                scan_type TEXT NOT NULL,
+                finding_count INTEGER NOT NULL,
+                PRIMARY KEY (run_id, provider, account_id, scan_type)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS findings (
+                run_id TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                finding_key TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                scan_type TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                finding TEXT NOT NULL,
+                PRIMARY KEY (run_id, provider, finding_key)
+            )
+        """)
+        # Regions or resources a scan of the run failed on: finding keys under them are not compared
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_failures (
+                run_id TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                scan_type TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                PRIMARY KEY (run_id, provider, account_id, scan_type, scope)
+            )
+        """)
+        # Fingerprints of scanned resources, so unchanged resources can reuse their previous finding
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                provider TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                scan_type TEXT NOT NULL,
+                resource_key TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                finding TEXT NOT NULL,
+                scanned_at TEXT NOT NULL,
+                PRIMARY KEY (provider, account_id, scan_type, resource_key)
+            )
+        """)
+        conn.commit()
+        _schema_ready.add(db_path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def new_run_id():
+    """Timestamped id of a scan run, e.g. 20250518T093000.123456Z (sorts chronologically)."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%fZ")
+
+def finding_key(account_id, scan_type, finding):
+    """Stable key of a finding across runs: account/service[/region]/resource id."""
+    resource_id = finding.get(FINDING_ID_FIELDS.get(scan_type, ""))
+    if resource_id is None:
+        resource_id = hashlib.sha1(json.dumps(finding, sort_keys=True, default=str).encode()).hexdigest()
+    parts = [account_id, scan_type, finding.get("region"), str(resource_id)]
+    return "/".join(part for part in parts if part)
+
+def iter_finding_keys(account_id, scan_type, results):
+    """(finding_key, finding) of one service's findings, with keys made unique within the service."""
+    seen = {}
+    for finding in results if isinstance(results, list) else []:
+        if not isinstance(finding, dict):
+            continue
+        key = finding_key(account_id, scan_type, finding)
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:  # same resource id twice (e.g. unnamed resources): keep both, in scan order
+            key = f"{key}#{seen[key]}"
+        yield key, finding
+
+def finding_rows(run_id, provider, account_id, scan_type, results):
+    """Snapshot rows (run, provider, key, account, service, digest, finding) for one service's findings."""
+    volatile = VOLATILE_FINDING_FIELDS.get(scan_type, set())
+    for key, finding in iter_finding_keys(account_id, scan_type, results):
+        data = json.dumps(finding, sort_keys=True, default=str)
+        stable = json.dumps({field: value for field, value in finding.items() if field not in volatile}, sort_keys=True, default=str)
+        yield run_id, provider, key, account_id, scan_type, hashlib.sha1(stable.encode()).hexdigest(), data
+
+@contextmanager
+def collect_scan_failures():
+    """Collect the scopes passed to record_scan_failure while a scanner runs (workers included
+    when they run in a copy of this context)."""
+    failures = []
+    token = _scan_failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _scan_failures.reset(token)
+
+def record_scan_failure(scope=None):
+    """Note what a failed_count of the current scan is about: a region or a resource id, or
+    (no scope) the whole scan, e.g. when the scanner could not list its resources."""
+    failures = _scan_failures.get()
+    if failures is not None:
+        failures.append(scope)
+
+def scan_failed(failed_count, failed_scopes):
+    """True when a scan's failures are not confined to the regions and resources it recorded."""
+    return bool(failed_count) and (not failed_scopes or None in failed_scopes)
+
+def failure_scope_key(account_id, scan_type, scope):
+    """Finding key prefix of a failed scope: account/service/scope."""
+    return f"{account_id}/{scan_type}/{scope}"
+
+def save_log(scan_type, account_name, results, avg_risk, scanned_count=0, failed_count=0, provider: str = "aws", account_id: str = "default", mitre_recommendations=None, run_id=None, failed_scopes=None):
+    """Save scan results for one service in a single transaction, without touching other scans.
+
+    With a run_id, the findings are also kept as part of that run's snapshot. Failures confined
+    to failed_scopes (regions or resources, see record_scan_failure) are recorded with it so a
+    diff skips only those; a scan that failed as a whole is left out of the run, so a diff does
+    not report the findings it missed as resolved.
+    """
+
+    with closing(connect_results_db()) as conn, conn:
+        conn.execute(
+            """
+            INSERT INTO scan_results (provider, account_id, account_name, scan_type, results, avg_risk,
+                                      scanned_count, failed_count, mitre_recommendations, saved_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (provider, account_id, scan_type) DO UPDATE SET
+                account_name = excluded.account_name,
+                results = excluded.results,
+                avg_risk = excluded.avg_risk,
+                scanned_count = excluded.scanned_count,
+                failed_count = excluded.failed_count,
+                mitre_recommendations = excluded.mitre_recommendations,
+                saved_at = excluded.saved_at
+            """,
+            (
+                provider, account_id, account_name, scan_type,
+                json.dumps(results, default=str), avg_risk, scanned_count, failed_count,
+                json.dumps(mitre_recommendations or [], default=str),
+                datetime.now(timezone.utc).isoformat(),
+            )
+        )
+
+        if run_id:
+            conn.execute(
+                "INSERT OR IGNORE INTO scan_runs (run_id, started_at) VALUES (?, ?)",
+                (run_id, datetime.now(timezone.utc).isoformat())
+            )
+            for table in ("run_scans", "findings", "run_failures"):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE run_id = ? AND provider = ? AND account_id = ? AND scan_type = ?",
+                    (run_id, provider, account_id, scan_type)
+                )
+            if not scan_failed(failed_count, failed_scopes):
+                rows = list(finding_rows(run_id, provider, account_id, scan_type, results))
+                conn.execute(
+                    "INSERT INTO run_scans (run_id, provider, account_id, scan_type, finding_count) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, provider, account_id, scan_type, len(rows))
+                )
+                conn.executemany("INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.executemany(
+                    "INSERT OR IGNORE INTO run_failures VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (run_id, provider, account_id, scan_type, failure_scope_key(account_id, scan_type, scope))
+                        for scope in set(failed_scopes or []) if failed_count
+                    ]
+                )
+
+    print(f"📝 {scan_type.upper()} scan results saved for account {account_id} to {os.path.join(LOGS_DIR, RESULTS_DB)}")
+
+def list_logged_account_summaries(provider="aws"):
+    """(account_id, account_name, finding_count) of every account in the store, without loading results."""
+    if not os.path.exists(os.path.join(LOGS_DIR, RESULTS_DB)):
+        return []
+    with closing(connect_results_db()) as conn:
+        return conn.execute(
+            """
+            SELECT account_id, account_name, SUM(scanned_count + failed_count) FROM scan_results
+            WHERE provider = ? GROUP BY account_id ORDER BY account_id
+            """,
+            (provider,)
+        ).fetchall()
+
+def load_account_log(account_id, provider="aws", scan_types=None):
+    """Rebuild an account's results in the logs.json layout: {"account_name": ..., "<scan_type>": {...}}.
+
+    When scan_types is given, only those scans are loaded.
+    """
+    scan_types = list(scan_types) if scan_types is not None else None
+    type_filter = f"AND scan_type IN ({', '.join('?' * len(scan_types))})" if scan_types else ""
+    with closing(connect_results_db()) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT account_name, scan_type, results, avg_risk, scanned_count, failed_count, mitre_recommendations
+            FROM scan_results WHERE provider = ? AND account_id = ? {type_filter} ORDER BY saved_at
+            """,
+            (provider, account_id, *(scan_types or []))
+        ).fetchall()
+
+    log_data = {}
+    for account_name, scan_type, results, avg_risk, scanned_count, failed_count, mitre_recommendations in rows:
+        log_data.setdefault("account_name", account_name)
+        log_data[scan_type] = {
+            "results": json.loads(results),
+            "avg_risk": avg_risk,
+            "scanned_count": scanned_count,
+            "failed_count": failed_count,
+            "mitre_recommendations": json.loads(mitre_recommendations)
+        }
+    return log_data
 
+def list_runs(provider="aws"):
+    """Scan runs with snapshots, oldest first: [(run_id, started_at, accounts, findings)]."""
+    if not os.path.exists(os.path.join(LOGS_DIR, RESULTS_DB)):
+        return []
+    with closing(connect_results_db()) as conn:
+        return conn.execute(
+            """
+            SELECT r.run_id, r.started_at, COUNT(DISTINCT s.account_id), COALESCE(SUM(s.finding_count), 0)
+            FROM scan_runs r JOIN run_scans s ON s.run_id = r.run_id AND s.provider = ?
+            GROUP BY r.run_id ORDER BY r.run_id
+            """,
+            (provider,)
+        ).fetchall()
+
+def load_run_scans(run_id, provider="aws", account_id=None):
+    """Set of (account_id, scan_type) pairs scanned in a run."""
+    with closing(connect_results_db()) as conn:
+        rows = conn.execute(
+            "SELECT account_id, scan_type FROM run_scans WHERE run_id = ? AND provider = ? AND (? IS NULL OR account_id = ?)",
+            (run_id, provider, account_id, account_id)
+        ).fetchall()
+    return set(rows)
+
+def load_run_failures(run_id, provider="aws", account_id=None):
+    """Finding key prefixes of the regions and resources that failed in a run's scans."""
+    with closing(connect_results_db()) as conn:
+        rows = conn.execute(
+            "SELECT scope FROM run_failures WHERE run_id = ? AND provider = ? AND (? IS NULL OR account_id = ?)",
+            (run_id, provider, account_id, account_id)
+        ).fetchall()
+    return {scope for scope, in rows}
+
+def iter_run_findings(run_id, provider="aws", account_id=None):
+    """Stream a run's snapshot as (finding_key, account_id, scan_type, digest, finding_json) rows."""
+    with closing(connect_results_db()) as conn:
+        yield from conn.execute(
+            """
+            SELECT finding_key, account_id, scan_type, digest, finding FROM findings
+            WHERE run_id = ? AND provider = ? AND (? IS NULL OR account_id = ?)
+            """,
+            (run_id, provider, account_id, account_id)
+        )
+
+def load_fingerprints(account_id, scan_type, provider="aws"):
+    """Stored fingerprints of a scanner's resources: {resource_key: (fingerprint, finding, scanned_at)}."""
+    with closing(connect_results_db()) as conn:
+        rows = conn.execute(
+            """
+            SELECT resource_key, fingerprint, finding, scanned_at FROM fingerprints
+            WHERE provider = ? AND account_id = ? AND scan_type = ?
+            """,
+            (provider, account_id, scan_type)
+        ).fetchall()
+    return {key: (fingerprint, json.loads(finding), scanned_at) for key, fingerprint, finding, scanned_at in rows}
+
+def save_fingerprints(account_id, scan_type, entries, provider="aws", replace=True):
+    """Store entries {resource_key: (fingerprint, finding, scanned_at)} as a scanner's fingerprints,
+    replacing all of them (replace) or only those of the same resources."""
+    with closing(connect_results_db()) as conn, conn:
+        if replace:
+            conn.execute(
+                "DELETE FROM fingerprints WHERE provider = ? AND account_id = ? AND scan_type = ?",
+                (provider, account_id, scan_type)
+            )
+        conn.executemany(
+            "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (provider, account_id, scan_type, key, fingerprint, json.dumps(finding, default=str), scanned_at)
+                for key, (fingerprint, finding, scanned_at) in entries.items()
+            )
+        )
+
+def export_account_log(account_id, provider="aws"):
+    """Write an account's stored results to logs/<provider>/<account_id>/logs.json (the classic JSON layout)."""
+    base_dir = os.path.join(LOGS_DIR, provider, account_id)
+    os.makedirs(base_dir, exist_ok=True)
     log_file_path = os.path.join(base_dir, "logs.json")
 
-    # Load existing log file or initialize new
-    if os.path.exists(log_file_path):
-        with open(log_file_path, "r", encoding="utf-8") as f:
-            try:
-                log_data = json.load(f)
-            except json.JSONDecodeError:
-                log_data = {}
-    else:
-        log_data = {}
-
-    # Save new scan data under its scan type (ec2, iam, etc.)
-    if "account_name" not in log_data:
-        log_data["account_name"] = account_name
-        
-    log_data[scan_type] = {
-        "results": results,
-        "avg_risk": avg_risk,
-        "scanned_count": scanned_count,
-        "failed_count": failed_count,
-        "mitre_recommendations": mitre_recommendations or []
-    }
-    
-    # Save back to file
-    with open(log_file_path, "w", encoding="utf-8") as f:
-        json.dump(log_data, f, indent=4)
-
-    print(f"📝 {scan_type.upper()} scan results saved for account {account_id} to {log_file_path}")
+    tmp_path = f"{log_file_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(load_account_log(account_id, provider), f, indent=4)
+    os.replace(tmp_path, log_file_path)
+    return log_file_path
+
+
+_output_lock = threading.Lock()
+_thread_output = threading.local()
+
+
+class _ThreadAwareStdout:
+    """Route stdout writes to the calling thread's capture buffer, if it has one."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def _target(self):
+        buffers = getattr(_thread_output, "buffers", None)
+        return buffers[-1] if buffers else self._stream
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        return self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _install_stdout_router():
+    with _output_lock:
+        if not isinstance(sys.stdout, _ThreadAwareStdout):
+            sys.stdout = _ThreadAwareStdout(sys.stdout)
+
+
+@contextmanager
+def capture_output():
+    """Collect everything the current thread prints so it can be emitted as one block."""
+    _install_stdout_router()
+    buffer = io.StringIO()
+    if not hasattr(_thread_output, "buffers"):
+        _thread_output.buffers = []
+    _thread_output.buffers.append(buffer)
+    try:
+        yield buffer
+    finally:
+        _thread_output.buffers.pop()
+
+
+def emit(text):
+    """Print a captured block without interleaving it with other threads' output."""
+    with _output_lock:
+        sys.stdout.write(text)
+        sys.stdout.flush()
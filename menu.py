@@ -1,17 +1,16 @@
 import sys
 import typer
 import time
-import subprocess
-from banner import display_banner
-from auth.status import get_auth_status
-from auth.auth_aws import list_aws_accounts
-from cloudcastle import scan_aws
-from export import export_to_html
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from auth.status import get_auth_status, start_auth_status_probes
+from logger import capture_output, emit, new_run_id
 
-from auth.auth_aws import list_aws_accounts
-from cloudcastle import scan_aws
+MAX_PARALLEL_ACCOUNTS = 4  # default number of accounts scanned at the same time
+
+def select_aws_accounts(max_workers=MAX_PARALLEL_ACCOUNTS, concurrent_services=True):
+    from auth.auth_aws import list_aws_accounts
 
-def select_aws_accounts():
     accounts = list_aws_accounts()
     print("\n📘 Select AWS Account(s) to scan:")
     
@@ -27,31 +26,87 @@ def select_aws_accounts():
     else:
         selected_accounts = [accounts[int(i)-1] for i in selected if i.strip().isdigit()]
 
-    print(f"🔄 Starting scan for {len(selected_accounts)} accounts...\n")
+    if len(selected_accounts) > 1:
+        max_workers = typer.prompt("Accounts to scan in parallel", default=max_workers, type=int)
+
+    print(f"🔄 Starting scan for {len(selected_accounts)} accounts ({max_workers} in parallel)...\n")
+
+    scan_accounts(selected_accounts, max_workers, concurrent_services)
+
+def scan_accounts(accounts, account_workers=MAX_PARALLEL_ACCOUNTS, concurrent_services=True, **scan_options):
+    """Scan accounts in parallel as one scan run, print the summary and return its rows.
+
+    scan_options are passed on to scan_aws (services, full, max_workers for the service scans).
+    """
+    started = time.monotonic()
+    run_id = new_run_id()  # all accounts of this selection belong to one scan run
+    summary = []
+    with ThreadPoolExecutor(max_workers=max(1, account_workers)) as executor:
+        futures = [
+            executor.submit(scan_account, acc, buffered=account_workers > 1, concurrent_services=concurrent_services, run_id=run_id, **scan_options)
+            for acc in accounts
+        ]
+        for future in futures:
+            summary.append(future.result())
+
+    print_scan_summary(summary, time.monotonic() - started)
+    print(f"🗂️ Scan run {run_id} saved. Compare runs with: python cloudcastle.py diff")
+    return summary
+
+def scan_account(acc, buffered=False, concurrent_services=False, run_id=None, **scan_options):
+    """Scan a single account and return its summary row. Output is printed as one block when buffered.
 
-    for acc in selected_accounts:
-        account_id = acc["id"]
-        account_name = acc["name"]
-        session = acc["session"]
+    The row's failed_scans lists the scan types that failed, or is None when the account was not scanned.
+    """
+    from cloudcastle import scan_aws
 
-        if not session:
-            print(f"❌ Skipping {account_id} (no session available)")
-            continue
+    account_id = acc["id"]
+    account_name = acc["name"]
+    session = acc["session"]
+    started = time.monotonic()
 
+    if not session:
+        print(f"❌ Skipping {account_id} (no session available)")
+        return {"id": account_id, "name": account_name, "status": "⏭️ Skipped", "elapsed": 0.0, "failed_scans": None}
+
+    failed_scans = []
+    with capture_output() if buffered else nullcontext() as output:
+        status = "✅ Done"
         try:
             print(f"\n🔍 Scanning {account_name} ({account_id})")
-            scan_aws(account_id=account_id, account_name=account_name, session=session)
+            failed_scans = scan_aws(
+                account_id=account_id, account_name=account_name, session=session,
+                concurrent=concurrent_services, run_id=run_id, **scan_options
+            )
+            if failed_scans:
+                status = f"⚠️ Failed scans: {', '.join(failed_scans)}"
 
         except Exception as e:
+            status = "❌ Failed"
+            failed_scans = None
             print(f"❌ Error scanning {account_id}: {e}")
 
+    if buffered:
+        emit(output.getvalue())
+
+    return {"id": account_id, "name": account_name, "status": status, "elapsed": time.monotonic() - started, "failed_scans": failed_scans}
+
+def print_scan_summary(summary, wall_time):
+    print("\n📋 Scan Summary:")
+    for row in summary:
+        print(f"   {row['status']}  {row['name']} ({row['id']}) - {row['elapsed']:.1f}s")
+    total = sum(row["elapsed"] for row in summary)
+    print(f"   ⏱️ Wall time: {wall_time:.1f}s (sum of account scan times: {total:.1f}s)")
+
 def go_to_azure_menu():
     typer.echo("🧩 Sorry, Azure Security Posture Scan not yet implemented.")
 def go_to_gcp_menu():
     typer.echo("🧩 Sorry, GCP Security Posture Scan not yet implemented.")
 
 def show_menu():
-    
+    from banner import display_banner
+
+    probes = start_auth_status_probes()  # providers answer while the banner renders
     display_banner()
 
     typer.echo("\n📌 CloudCastle - Cloud Security Posture Tool")
@@ -59,7 +114,9 @@ def show_menu():
     typer.echo("📌 Meet us at: www.securityjoes.com\n\n")
 
     print("Connection Status:")
-    get_auth_status() # prints auth status for each cloud provider
+    statuses = get_auth_status(probes) # prints auth status for each cloud provider
+    if statuses["AWS"] is False:
+        sys.exit(1)
 
     while True:
         # MAIN MENU #
@@ -80,6 +137,7 @@ def show_menu():
         elif provider_choice == "3":
             go_to_gcp_menu()
         elif provider_choice =="4":
+            from export import export_to_html
             export_to_html()
             typer.echo("HTML report created from last scan.")
         elif provider_choice == "5":
@@ -0,0 +1,128 @@
+import json
+import time
+from cloudcastle import SERVICE_WORKERS
+from menu import MAX_PARALLEL_ACCOUNTS
+
+# Exit codes of the headless scan command
+EXIT_OK = 0
+EXIT_SCAN_FAILED = 1       # some accounts or services could not be scanned
+EXIT_INVALID_PLAN = 2
+EXIT_NOTHING_SCANNED = 3   # no account could be scanned at all
+
+PLAN_FIELDS = {"accounts", "services", "regions", "concurrency", "output", "full"}
+CONCURRENCY_FIELDS = {"accounts", "services"}
+
+def load_scan_plan(path, scan_types):
+    """Read and validate a JSON scan plan; raises ValueError describing the first problem.
+
+    Every field is optional:
+        accounts     account ids to scan (default: every account in cloudcastle_config.json)
+        services     scan types to run, out of scan_types (default: all)
+        regions      regions to scan in every account (default: the account's allow-list or all enabled regions)
+        concurrency  {"accounts": accounts scanned at once, "services": service scans at once per account}
+        output       directory of the results store and logs (default: logs)
+        full         rescan every resource instead of reusing unchanged findings (default: false)
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"cannot read {path}: {e}")
+
+    if not isinstance(plan, dict):
+        raise ValueError("the plan must be a JSON object")
+    unknown = set(plan) - PLAN_FIELDS
+    if unknown:
+        raise ValueError(f"unknown field(s) {', '.join(sorted(unknown))}; expected {', '.join(sorted(PLAN_FIELDS))}")
+
+    accounts = plan.get("accounts")
+    if accounts is not None:
+        if not isinstance(accounts, list) or not accounts:
+            raise ValueError("accounts must be a non-empty list of account ids")
+        accounts = [str(account) for account in accounts]
+
+    services = plan.get("services")
+    if services is not None:
+        if not isinstance(services, list) or not services:
+            raise ValueError("services must be a non-empty list of scan types")
+        unknown = [service for service in services if service not in scan_types]
+        if unknown:
+            raise ValueError(f"unknown service(s) {', '.join(map(str, unknown))}; expected {', '.join(scan_types)}")
+
+    regions = plan.get("regions")
+    if regions is not None and (not isinstance(regions, list) or not regions or not all(isinstance(r, str) for r in regions)):
+        raise ValueError("regions must be a non-empty list of region names")
+
+    concurrency = plan.get("concurrency", {})
+    if not isinstance(concurrency, dict) or set(concurrency) - CONCURRENCY_FIELDS:
+        raise ValueError('concurrency must be an object with "accounts" and/or "services"')
+    for field, value in concurrency.items():
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"concurrency.{field} must be a positive integer")
+
+    output = plan.get("output")
+    if output is not None and (not isinstance(output, str) or not output):
+        raise ValueError("output must be a directory path")
+
+    full = plan.get("full", False)
+    if not isinstance(full, bool):
+        raise ValueError("full must be true or false")
+
+    return {
+        "accounts": accounts,
+        "services": services,
+        "regions": regions,
+        "account_workers": concurrency.get("accounts", MAX_PARALLEL_ACCOUNTS),
+        "service_workers": concurrency.get("services", SERVICE_WORKERS),
+        "output": output,
+        "full": full,
+    }
+
+def run_scan_plan(plan):
+    """Scan the accounts of a validated plan without prompts. Returns the exit code."""
+    import logger
+    from auth.auth_aws import list_aws_accounts, load_aws_config
+    from aws_scanner.regions import set_scan_regions
+    from menu import scan_accounts
+
+    if plan["output"]:
+        logger.LOGS_DIR = plan["output"]
+
+    started = time.monotonic()
+    # Unconfigured accounts are told apart from a failed account load (e.g. no credentials),
+    # which list_aws_accounts reports once on its own
+    try:
+        configured = {acct.get("id") for acct in load_aws_config() or []}
+    except Exception as e:
+        print(f"❌ Could not read cloudcastle_config.json: {e}")
+        return EXIT_NOTHING_SCANNED
+    missing = sorted(set(plan["accounts"] or []) - configured)
+    for account_id in missing:
+        print(f"❌ Account {account_id} is not in cloudcastle_config.json")
+
+    accounts = list_aws_accounts(plan["accounts"])
+    if not accounts:
+        print("❌ No accounts to scan.")
+        return EXIT_NOTHING_SCANNED
+
+    if plan["regions"]:
+        for acc in accounts:
+            set_scan_regions(acc["id"], plan["regions"])
+
+    print(f"🔄 Starting scan for {len(accounts)} accounts ({plan['account_workers']} in parallel)...\n")
+    summary = scan_accounts(
+        accounts,
+        account_workers=plan["account_workers"],
+        concurrent_services=plan["service_workers"] > 1,
+        max_workers=plan["service_workers"],
+        services=plan["services"],
+        full=plan["full"],
+    )
+    print(f"⏱️ Plan finished in {time.monotonic() - started:.1f}s")
+
+    scanned = [row for row in summary if row["failed_scans"] is not None]
+    if not scanned:
+        return EXIT_NOTHING_SCANNED
+    if missing or len(scanned) < len(summary) or any(row["failed_scans"] for row in scanned):
+        return EXIT_SCAN_FAILED
+    return EXIT_OK
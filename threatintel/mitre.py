@@ -2,9 +2,16 @@ import json
 import os
 import requests
 import re
+import threading
+from collections import deque
 
 MITRE_DB_PATH = os.path.join(os.path.dirname(__file__), "mitre_db.json")
 
+# Compiled matchers per scan type, rebuilt when mitre_db.json changes on disk
+_matcher_cache = {"stamp": None, "db": {}, "matchers": {}}
+_matcher_lock = threading.Lock()
+_db_write_lock = threading.Lock()
+
 def clean_text(text):
     """Normalize text to lowercase alphanumeric only."""
     return re.sub(r'[^\w\s]', '', str(text)).lower()
@@ -18,8 +25,10 @@ def load_mitre_db():
 
 def save_mitre_db(data):
     """Persist updated MITRE mapping database."""
-    with open(MITRE_DB_PATH, "w", encoding="utf-8") as f:
+    tmp_path = f"{MITRE_DB_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4)
+    os.replace(tmp_path, MITRE_DB_PATH)  # readers never see a half-written file
 
 def fetch_mitre_technique(technique_id):
     """Fetch MITRE technique metadata dynamically from MITRE ATT&CK API (or fallback)."""
@@ -38,34 +47,134 @@ def fetch_mitre_technique(technique_id):
             "url": url
         }
 
+# Below this many patterns, C-level substring checks beat a pure-Python automaton
+AHO_CORASICK_MIN_PATTERNS = 50
+
+class PatternMatcher:
+    """Aho-Corasick automaton: finds every pattern occurring in a text in a single pass."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        self.always = []  # empty patterns match any text
+
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                self.always.append(index)
+                continue
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.out[state].append(index)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.out[next_state] = self.out[next_state] + self.out[self.fail[next_state]]
+
+    def search(self, text):
+        """Return the indexes of the patterns found in text."""
+        found = set(self.always)
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            found.update(self.out[state])
+        return found
+
+def _mitre_db_stamp():
+    try:
+        stat = os.stat(MITRE_DB_PATH)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+class SubstringMatcher:
+    """Matches a small set of patterns with one substring check per pattern."""
+
+    def __init__(self, patterns):
+        self.patterns = list(enumerate(patterns))
+
+    def search(self, text):
+        """Return the indexes of the patterns found in text."""
+        return {index for index, pattern in self.patterns if pattern in text}
+
+def compile_patterns(patterns):
+    matcher_class = PatternMatcher if len(patterns) >= AHO_CORASICK_MIN_PATTERNS else SubstringMatcher
+    return matcher_class(patterns)
+
+def get_scan_matcher(scan_type):
+    """Return (matcher, mitre entries) for a scan type, compiled once per version of the DB file."""
+    stamp = _mitre_db_stamp()
+    with _matcher_lock:
+        if _matcher_cache["stamp"] != stamp:
+            _matcher_cache.update(stamp=stamp, db=load_mitre_db(), matchers={})
+
+        matchers = _matcher_cache["matchers"]
+        if scan_type not in matchers:
+            mappings = list(_matcher_cache["db"].get(scan_type, {}).items())
+            matcher = compile_patterns([clean_text(mapped_issue) for mapped_issue, _ in mappings])
+            matchers[scan_type] = (matcher, [mitre_data for _, mitre_data in mappings])
+        return matchers[scan_type]
+
+def finding_text(item):
+    """Flatten a finding (keys and values) into the text the MITRE mappings are matched against."""
+    if isinstance(item, dict):
+        return clean_text(" ".join(f"{key} {value}" for key, value in item.items()))
+    return clean_text(item)
+
 def match_findings_to_tactics(scan_type, results):
     """Match scan findings against MITRE mapping."""
-    mitre_db = load_mitre_db()
+    matcher, mitre_entries = get_scan_matcher(scan_type)
     recommendations = []
+    if not mitre_entries:
+        return recommendations
 
+    seen = set()
     for item in results:
-        description = ""
-        if isinstance(item, dict):
-            description = json.dumps(item)
-        elif isinstance(item, str):
-            description = item
-        else:
+        if not isinstance(item, (dict, str)):
             continue
 
-        for mapped_issue, mitre_data in mitre_db.get(scan_type, {}).items():
-            if clean_text(mapped_issue) in clean_text(description):
-                if mitre_data not in recommendations:
-                    recommendations.append(mitre_data)
+        for index in sorted(matcher.search(finding_text(item))):
+            mitre_data = mitre_entries[index]
+            key = json.dumps(mitre_data, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                recommendations.append(mitre_data)
 
     return recommendations
 
 def enrich_mitre_db(scan_type, keyword, technique_id):
     """Update local DB with new mapping if not exists."""
-    mitre_db = load_mitre_db()
-    if scan_type not in mitre_db:
-        mitre_db[scan_type] = {}
-
-    if keyword not in mitre_db[scan_type]:
-        mitre_data = fetch_mitre_technique(technique_id)
-        mitre_db[scan_type][keyword] = mitre_data
-        save_mitre_db(mitre_db)
\ No newline at end of file
+    enrich_mitre_db_batch([(scan_type, keyword, technique_id)])
+
+def enrich_mitre_db_batch(mappings):
+    """Add (scan_type, keyword, technique_id) mappings that do not exist yet, writing the DB once.
+
+    Returns the number of mappings added.
+    """
+    with _db_write_lock:
+        mitre_db = load_mitre_db()
+        added = 0
+        for scan_type, keyword, technique_id in mappings:
+            scan_mappings = mitre_db.setdefault(scan_type, {})
+            if keyword not in scan_mappings:
+                scan_mappings[keyword] = fetch_mitre_technique(technique_id)
+                added += 1
+
+        if added:
+            save_mitre_db(mitre_db)
+    return added